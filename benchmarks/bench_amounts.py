@@ -0,0 +1,45 @@
+"""
+Micro-benchmark of the amount conversions used while parsing statements.
+
+Usage: python benchmarks/bench_amounts.py [rows]
+"""
+import random
+import sys
+import timeit
+from decimal import Decimal
+
+from nubank_django.utils import amount_to_decimal, cents_to_decimal
+
+
+def legacy_amount_to_decimal(amount: float) -> Decimal:
+    return Decimal.from_float(amount).quantize(Decimal("1.00"))
+
+
+def _best_of(func, values, repeat: int = 5) -> float:
+    return min(timeit.repeat(lambda: [func(value) for value in values], number=1, repeat=repeat))
+
+
+def main(rows: int = 100_000) -> None:
+    random.seed(42)
+    cents = [random.randint(1, 10_000_00) for _ in range(rows)]
+    reais = [value / 100 for value in cents]
+
+    results = {
+        "card, legacy (cents / 100 -> from_float -> quantize)": _best_of(
+            lambda value: legacy_amount_to_decimal(value / 100), cents
+        ),
+        "card, cents_to_decimal": _best_of(cents_to_decimal, cents),
+        "nuconta, legacy (from_float -> quantize)": _best_of(legacy_amount_to_decimal, reais),
+        "nuconta, amount_to_decimal": _best_of(amount_to_decimal, reais),
+    }
+
+    print(f"{rows} rows")
+    for name, seconds in results.items():
+        print(f"{name:<55} {seconds * 1000:8.1f} ms  {rows / seconds:12,.0f} rows/s")
+
+    mismatches = sum(amount_to_decimal(value) != legacy_amount_to_decimal(value) for value in reais)
+    print(f"nuconta conversions differing from legacy: {mismatches}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,148 @@
+"""
+Benchmark of the statement changelist queries, before and after the changelist indexes.
+
+Seeds `rows` card and NuConta statements on a database without the indexes of
+migration 0008_changelist_indexes, times the queries the admin changelists run
+(first page, newest first, unfiltered and with each list filter) and records their
+query plans, then applies the migration and does it all again.
+
+SQLite in a temporary file is used by default, see `bench_settings` to point it to
+another database.
+
+Usage: python benchmarks/bench_changelist.py [rows] [--output results.json]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from bench_settings import configure
+
+BEFORE_MIGRATION = "0007_monthly_summaries"
+AFTER_MIGRATION = "0008_changelist_indexes"
+PAGE_SIZE = 100  # ModelAdmin.list_per_page
+SEED_BATCH_SIZE = 5000
+
+TITLES = ["restaurante", "supermercado", "transporte", "serviços", "lazer", "saúde", "educação", "casa", "outros"]
+SOURCES = ["upfront_national", "installments_merchant", "upfront_foreign", None]
+ACCOUNT_TYPES = ["TransferOutEvent", "TransferInEvent", "BillPaymentEvent", "PixTransferOutEvent", "AddToReserveEvent"]
+
+
+def _historical_models(migration: str) -> tuple:
+    """The statement models as of `migration`, matching the tables whatever fields were added later."""
+    from django.db import connection
+    from django.db.migrations.loader import MigrationLoader
+
+    apps = MigrationLoader(connection).project_state(("nubank_django", migration)).apps
+    return apps.get_model("nubank_django", "CardStatement"), apps.get_model("nubank_django", "AccountStatement")
+
+
+def _seed(rows: int) -> None:
+    CardStatement, AccountStatement = _historical_models(BEFORE_MIGRATION)
+
+    random.seed(42)
+    start = datetime(2015, 1, 1, tzinfo=timezone.utc)
+    span = int((datetime(2022, 1, 1, tzinfo=timezone.utc) - start).total_seconds())
+    for offset in range(0, rows, SEED_BATCH_SIZE):
+        count = min(SEED_BATCH_SIZE, rows - offset)
+        CardStatement.objects.bulk_create(
+            CardStatement(
+                nubank_id=uuid.uuid4(),
+                amount=Decimal(random.randint(100, 100_000)).scaleb(-2),
+                category="transaction",
+                description=f"Compra {random.randint(1, 50_000)}",
+                details={"status": "settled"},
+                source=random.choice(SOURCES),
+                time=start + timedelta(seconds=random.randrange(span)),
+                title=random.choice(TITLES),
+            )
+            for _ in range(count)
+        )
+        AccountStatement.objects.bulk_create(
+            AccountStatement(
+                nubank_id=uuid.uuid4(),
+                amount=Decimal(random.randint(100, 100_000)).scaleb(-2),
+                detail=f"Transferência {random.randint(1, 50_000)}",
+                post_date=date(2015, 1, 1) + timedelta(days=random.randrange(span // 86400)),
+                title="Transferência",
+                gql_typename=random.choice(ACCOUNT_TYPES),
+            )
+            for _ in range(count)
+        )
+
+
+def _changelist_queries(migration: str) -> dict:
+    """First changelist page for each filter, ordered like the admin (its ordering plus -pk)."""
+    CardStatement, AccountStatement = _historical_models(migration)
+
+    cards = CardStatement.objects.order_by("-time", "-pk")
+    accounts = AccountStatement.objects.order_by("-post_date", "-pk")
+    march = (datetime(2020, 3, 1, tzinfo=timezone.utc), datetime(2020, 3, 31, tzinfo=timezone.utc))
+    return {
+        "card: unfiltered": cards,
+        "card: title": cards.filter(title="lazer"),
+        "card: source": cards.filter(source="upfront_foreign"),
+        "card: time range": cards.filter(time__range=march),
+        "card: title + time range": cards.filter(title="lazer", time__range=march),
+        "nuconta: unfiltered": accounts,
+        "nuconta: type": accounts.filter(gql_typename="TransferInEvent"),
+        "nuconta: post_date range": accounts.filter(post_date__range=(date(2020, 3, 1), date(2020, 3, 31))),
+        "nuconta: type + post_date range": accounts.filter(
+            gql_typename="TransferInEvent", post_date__range=(date(2020, 3, 1), date(2020, 3, 31))
+        ),
+    }
+
+
+def _measure(migration: str, repeat: int = 5) -> dict:
+    results = {}
+    for name, queryset in _changelist_queries(migration).items():
+        page = queryset[:PAGE_SIZE]
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(page.all())  # a fresh queryset, not the cached results
+            timings.append(time.perf_counter() - start)
+        results[name] = {"best_ms": min(timings) * 1000, "plan": page.explain()}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("rows", type=int, nargs="?", default=1_000_000, help="Statements of each kind to seed.")
+    parser.add_argument("--output", help="Write results, query plans included, to this JSON file.")
+    args = parser.parse_args()
+
+    configure()
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+    call_command("migrate", "nubank_django", BEFORE_MIGRATION, verbosity=0)
+    call_command("flush", interactive=False, verbosity=0)
+
+    start = time.perf_counter()
+    _seed(args.rows)
+    print(f"Seeded {args.rows} statements of each kind in {time.perf_counter() - start:.1f}s")
+
+    before = _measure(BEFORE_MIGRATION)
+    start = time.perf_counter()
+    call_command("migrate", "nubank_django", AFTER_MIGRATION, verbosity=0)
+    print(f"Created indexes in {time.perf_counter() - start:.1f}s")
+    after = _measure(AFTER_MIGRATION)
+
+    print(f"{'query':<35} {'before':>10} {'after':>10} {'speedup':>8}")
+    for name in before:
+        before_ms, after_ms = before[name]["best_ms"], after[name]["best_ms"]
+        print(f"{name:<35} {before_ms:8.1f}ms {after_ms:8.1f}ms {before_ms / after_ms:7.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"rows": args.rows, "before": before, "after": after}, output_file, indent=2)
+        print(f"Query plans written to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
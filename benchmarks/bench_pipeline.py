@@ -0,0 +1,219 @@
+"""
+Benchmark of the import pipeline on synthetic feeds (see `feeds`), measuring the
+throughput and peak Python memory (tracemalloc) of each stage:
+
+- normalize: `get_account_feed_with_pix_mapping`, PIX and reserve events mapping (NuConta only)
+- parse: `parse_*_statements`, with `clean_fields()`
+- parse (bulk validation): `parse_*_statements(bulk_validation=True)`
+- persist: `persist_*` in batches of DEFAULT_BATCH_SIZE, on an empty database
+
+Every stage is timed, best of several runs, without tracemalloc (which slows Python
+down a lot) and then run once more, traced. Results are compared with
+benchmarks/baselines.json, for the same database vendor and size, and the run fails
+when a stage is slower or takes more memory than its baseline by more than the
+tolerance. Baselines are machine specific, record new ones with --save-baseline
+before comparing runs on another machine.
+
+SQLite in a temporary file is used by default, see `bench_settings` to point it to
+another database, e.g. a local PostgreSQL.
+
+Usage: python benchmarks/bench_pipeline.py [sizes ...] [--save-baseline] [--tolerance 0.3]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Optional
+
+from bench_settings import configure
+from feeds import generate_account_feed, generate_card_feed
+
+# Larger sizes, e.g. 1000000, can be passed as arguments but have no recorded baseline.
+DEFAULT_SIZES = [10_000, 100_000]
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+# Timings vary between runs more than memory does, the tolerance has to absorb that.
+DEFAULT_TOLERANCE = 0.3
+# Timed runs per stage, the best one counts. Quick stages run until they add up to
+# MIN_TIMED_SECONDS, a single run of a few milliseconds is mostly noise.
+REPEAT = 3
+MIN_TIMED_SECONDS = 1.0
+# Keeps the pipeline's logs, one per reject among them, out of the results.
+QUIET_LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"null": {"class": "logging.NullHandler"}},
+    "loggers": {"nubank_django": {"handlers": ["null"], "propagate": False}},
+}
+
+
+def _measure(run: Callable[[], None], rows: int, setup: Optional[Callable[[], None]] = None) -> dict:
+    seconds, runs, total = float("inf"), 0, 0.0
+    while runs < REPEAT or total < MIN_TIMED_SECONDS:
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        seconds, runs, total = min(seconds, elapsed), runs + 1, total + elapsed
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": seconds, "rows_per_s": rows / seconds, "peak_mb": peak / 2**20}
+
+
+def _empty_database() -> None:
+    from django.core.management import call_command
+
+    call_command("flush", interactive=False, verbosity=0)
+
+
+def _persist_in_batches(persist: Callable[[list], object], parsed: list) -> Callable[[], None]:
+    from nubank_django.domain import DEFAULT_BATCH_SIZE
+
+    def run() -> None:
+        for start in range(0, len(parsed), DEFAULT_BATCH_SIZE):
+            persist(parsed[start : start + DEFAULT_BATCH_SIZE])
+
+    return run
+
+
+def bench_card(rows: int) -> Dict[str, dict]:
+    from nubank_django.domain import parse_card_statements, persist_card_statements
+
+    raw = generate_card_feed(rows)
+    parsed = parse_card_statements(raw, bulk_validation=True)
+    return {
+        "parse": _measure(lambda: parse_card_statements(raw), rows),
+        "parse (bulk validation)": _measure(lambda: parse_card_statements(raw, bulk_validation=True), rows),
+        "persist": _measure(_persist_in_batches(persist_card_statements, parsed), len(parsed), _empty_database),
+    }
+
+
+def bench_nuconta(rows: int) -> Dict[str, dict]:
+    from pynubank import MockHttpClient
+
+    from nubank_django.domain import (
+        parse_account_statements,
+        persist_parsed_account_statements,
+    )
+    from nubank_django.nu import NubankClient
+
+    client = NubankClient(MockHttpClient())
+    feed = []
+
+    def new_feed() -> None:
+        # Normalization updates records in place, each run gets pristine ones.
+        feed[:] = generate_account_feed(rows)
+
+    client.get_account_feed = lambda: feed
+    normalize = lambda: client.get_account_feed_with_pix_mapping(cache_policy="ignore")  # noqa: E731
+    results = {"normalize": _measure(normalize, rows, new_feed)}
+
+    new_feed()
+    raw = normalize()
+    parsed = parse_account_statements(raw, bulk_validation=True)
+    results.update(
+        {
+            "parse": _measure(lambda: parse_account_statements(raw), len(raw)),
+            "parse (bulk validation)": _measure(lambda: parse_account_statements(raw, bulk_validation=True), len(raw)),
+            "persist": _measure(
+                _persist_in_batches(persist_parsed_account_statements, parsed), len(parsed), _empty_database
+            ),
+        }
+    )
+    return results
+
+
+def _regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for source, stages in results.items():
+        for stage, metrics in stages.items():
+            expected = baseline.get(source, {}).get(stage)
+            if not expected:
+                continue
+            if metrics["rows_per_s"] < expected["rows_per_s"] * (1 - tolerance):
+                regressions.append(
+                    f"{source} {stage}: {metrics['rows_per_s']:,.0f} rows/s, was {expected['rows_per_s']:,.0f}"
+                )
+            if metrics["peak_mb"] > expected["peak_mb"] * (1 + tolerance):
+                regressions.append(f"{source} {stage}: {metrics['peak_mb']:.1f} MB peak, was {expected['peak_mb']:.1f}")
+    return regressions
+
+
+def _print_results(rows: int, results: dict, baseline: dict) -> None:
+    print(f"\n{rows:,} records")
+    print(f"{'stage':<35} {'seconds':>9} {'rows/s':>12} {'baseline':>12} {'peak MB':>9} {'baseline':>9}")
+    for source, stages in results.items():
+        for stage, metrics in stages.items():
+            expected = baseline.get(source, {}).get(stage, {})
+            expected_rate = f"{expected['rows_per_s']:,.0f}" if expected else "-"
+            expected_peak = f"{expected['peak_mb']:.1f}" if expected else "-"
+            print(
+                f"{source + ': ' + stage:<35} {metrics['seconds']:9.2f} {metrics['rows_per_s']:12,.0f} "
+                f"{expected_rate:>12} {metrics['peak_mb']:9.1f} {expected_peak:>9}"
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sizes", type=int, nargs="*", default=DEFAULT_SIZES, help="Records per feed.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baselines.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed regression, 0.3 is 30%%.")
+    args = parser.parse_args()
+
+    configure(LOGGING=QUIET_LOGGING)
+    from django.core.management import call_command
+    from django.db import connection
+
+    call_command("migrate", verbosity=0)
+
+    baselines = {}
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH) as baselines_file:
+            baselines = json.load(baselines_file)
+
+    regressions = []
+    for rows in args.sizes:
+        key = f"{connection.vendor}/{rows}"
+        _empty_database()
+        results = {"card": bench_card(rows), "nuconta": bench_nuconta(rows)}
+        _print_results(rows, results, baselines.get(key, {}))
+        regressions += [
+            f"{key} {regression}" for regression in _regressions(results, baselines.get(key, {}), args.tolerance)
+        ]
+        if args.save_baseline:
+            baselines[key] = {
+                source: {
+                    stage: {"rows_per_s": round(m["rows_per_s"]), "peak_mb": round(m["peak_mb"], 1)}
+                    for stage, m in stages.items()
+                }
+                for source, stages in results.items()
+            }
+
+    if args.save_baseline:
+        with open(BASELINES_PATH, "w") as baselines_file:
+            json.dump(dict(sorted(baselines.items())), baselines_file, indent=2)
+            baselines_file.write("\n")
+        print(f"\nBaselines written to {BASELINES_PATH}")
+        return 0
+
+    if regressions:
+        print("\nRegressions:")
+        print("\n".join(f"  {regression}" for regression in regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
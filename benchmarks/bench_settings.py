@@ -0,0 +1,33 @@
+"""
+Django settings shared by the benchmarks that need a database.
+
+SQLite in a temporary file is used by default; point it to another database with the
+BENCH_DB_ENGINE, BENCH_DB_NAME, BENCH_DB_USER, BENCH_DB_PASSWORD and BENCH_DB_HOST
+environment variables (the database is flushed).
+"""
+import os
+import tempfile
+
+import django
+from django.conf import settings
+
+
+def configure(**overrides) -> None:
+    engine = os.getenv("BENCH_DB_ENGINE", "django.db.backends.sqlite3")
+    name = os.getenv("BENCH_DB_NAME") or os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    settings.configure(
+        INSTALLED_APPS=["django.contrib.contenttypes", "django.contrib.auth", "nubank_django"],
+        DATABASES={
+            "default": {
+                "ENGINE": engine,
+                "NAME": name,
+                "USER": os.getenv("BENCH_DB_USER", ""),
+                "PASSWORD": os.getenv("BENCH_DB_PASSWORD", ""),
+                "HOST": os.getenv("BENCH_DB_HOST", ""),
+            }
+        },
+        USE_TZ=True,
+        DEFAULT_AUTO_FIELD="django.db.models.AutoField",
+        **overrides,
+    )
+    django.setup()
@@ -0,0 +1,123 @@
+"""
+Synthetic Nubank feeds, shaped like the API responses (see pynubank's mocked
+responses), for benchmarks needing more records than the test fixtures have.
+
+Feeds are deterministic for a given seed and ordered newest first, like the API's.
+"""
+import random
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator, List
+
+# Feeds spread over this many days before 2022, whatever their size.
+HISTORY_DAYS = 10 * 365
+
+CARD_TITLES = ["restaurante", "supermercado", "transporte", "serviços", "lazer", "saúde", "educação", "casa", "outros"]
+CARD_SOURCES = ["upfront_national", "installments_merchant", "upfront_foreign", None]
+MERCHANTS = ["Netflix.Com", "Uber *Trip", "Ifood *Ifood", "Padaria Real", "Posto Shell", "Amazon", "Drogasil"]
+NAMES = ["Waldisney da Silva", "Lorena Fernandes", "Maria José", "João Pedro", "Ana Luíza", "Carlos Eduardo"]
+COMPANIES = ["CONFIDENCE CORRETORA DE CAMBIO S A", "ELETROPAULO", "SABESP", "CLARO S A"]
+
+# (kind, weight) of NuConta feed events. GenericFeedEvents are what the app shows
+# without a dedicated type: PIX transfers (mapped on normalization) and things
+# like card payments (dropped).
+ACCOUNT_EVENT_WEIGHTS = [
+    ("TransferOutEvent", 15),
+    ("TransferInEvent", 15),
+    ("TransferOutReversalEvent", 1),
+    ("BillPaymentEvent", 5),
+    ("BarcodePaymentEvent", 5),
+    ("AddToReserveEvent", 8),
+    ("RemoveFromReserveEvent", 4),
+    ("PixTransferOut", 25),
+    ("PixTransferIn", 12),
+    ("GenericFeedEvent", 10),
+]
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _brl(value: float) -> str:
+    """1234.5 as "R$ 1.234,50"."""
+    return "R$ " + f"{value:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def iter_card_feed(rows: int, seed: int = 42) -> Iterator[dict]:
+    rng = random.Random(seed)
+    account = _uuid(rng)
+    moment = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    max_gap = max(2 * HISTORY_DAYS * 86400 // max(rows, 1), 1)
+    for _ in range(rows):
+        moment -= timedelta(seconds=rng.randint(0, max_gap))
+        statement_id = _uuid(rng)
+        amount = rng.randint(100, 200_000)
+        yield {
+            "description": f"{rng.choice(MERCHANTS)} {rng.randint(1, 999)}",
+            "category": "transaction",
+            "amount": amount,
+            "time": moment.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "source": rng.choice(CARD_SOURCES),
+            "title": rng.choice(CARD_TITLES),
+            "amount_without_iof": amount,
+            "account": account,
+            "details": {"status": rng.choice(["settled", "unsettled"]), "subcategory": "card_present"},
+            "id": statement_id,
+            "_links": {"self": {"href": f"https://prod-s0-facade.nubank.com.br/api/transactions/{statement_id}"}},
+            "tokenized": rng.random() < 0.3,
+            "href": f"nuapp://transaction/{statement_id}",
+        }
+
+
+def _account_event(rng: random.Random, kind: str, post_date: date) -> dict:
+    amount = rng.randint(100, 500_000) / 100
+    name = rng.choice(NAMES)
+    event = {"id": _uuid(rng), "__typename": kind, "postDate": post_date.isoformat()}
+
+    if kind == "TransferOutEvent":
+        event.update(
+            title="Transferência enviada",
+            detail=f"{name} - {_brl(amount)}",
+            amount=amount,
+            destinationAccount={"name": name},
+        )
+    elif kind == "TransferInEvent":
+        event.update(title="Transferência recebida", detail=_brl(amount), amount=amount, originAccount={"name": name})
+    elif kind == "TransferOutReversalEvent":
+        event.update(title="Transferência devolvida", detail=_brl(amount), amount=amount)
+    elif kind == "BillPaymentEvent":
+        event.update(title="Pagamento da fatura", detail=f"Cartão Nubank - {_brl(amount)}", amount=amount)
+    elif kind == "BarcodePaymentEvent":
+        event.update(title="Pagamento efetuado", detail=rng.choice(COMPANIES), amount=amount)
+    elif kind == "AddToReserveEvent":
+        # Reserve events only carry the amount in their detail.
+        event.update(title="Dinheiro guardado", detail=_brl(amount))
+    elif kind == "RemoveFromReserveEvent":
+        event.update(title="Dinheiro resgatado", detail=_brl(amount))
+    elif kind == "PixTransferOut":
+        event.update(__typename="GenericFeedEvent", title="Transferência enviada", detail=f"{name}\n{_brl(amount)}")
+    elif kind == "PixTransferIn":
+        event.update(__typename="GenericFeedEvent", title="Transferência recebida", detail=f"{name}\n{_brl(amount)}")
+    else:
+        event.update(title="Compra no débito", detail=f"{rng.choice(MERCHANTS)}\n{_brl(amount)}")
+    return event
+
+
+def iter_account_feed(rows: int, seed: int = 42) -> Iterator[dict]:
+    rng = random.Random(seed)
+    kinds, weights = zip(*ACCOUNT_EVENT_WEIGHTS)
+    post_date = date(2022, 1, 1)
+    new_day_probability = min(HISTORY_DAYS / max(rows, 1), 1)
+    for _ in range(rows):
+        if rng.random() < new_day_probability:
+            post_date -= timedelta(days=1)
+        yield _account_event(rng, rng.choices(kinds, weights)[0], post_date)
+
+
+def generate_card_feed(rows: int, seed: int = 42) -> List[dict]:
+    return list(iter_card_feed(rows, seed))
+
+
+def generate_account_feed(rows: int, seed: int = 42) -> List[dict]:
+    return list(iter_account_feed(rows, seed))
@@ -1,18 +1,114 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
 from django_object_actions import DjangoObjectActions
 from rangefilter.filters import DateRangeFilter
 
-from nubank_django.domain import full_load_card_statements, full_load_nuconta_statements
-from nubank_django.models import CardStatement, AccountStatement
+from nubank_django.exports import csv_export_response
+from nubank_django.facets import FacetListFilter
+from nubank_django.jobs import ImportAlreadyRunning, enqueue_import, get_latest_job
+from nubank_django.models import (
+    AccountMonthlySummary,
+    AccountStatement,
+    CardMonthlySummary,
+    CardStatement,
+    ImportJob,
+    SyncCheckpoint,
+)
+from nubank_django.pagination import EstimatedCountPaginator, KeysetChangeList
+from nubank_django.search import search_statements
+
+
+class StatementSearchMixin:
+    """Searches through `nubank_django.search` instead of OR-ing `icontains` over `search_fields`."""
+
+    def get_search_results(self, request, queryset, search_term):
+        return search_statements(queryset, search_term), False
+
+
+class StatementChangeList(KeysetChangeList):
+    """Loads only the listed columns; the change view still gets whole statements."""
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).for_listing()
+
+
+class LargeChangeListMixin:
+    """Changelist without exact counts nor deep OFFSETs, see `nubank_django.pagination`."""
+
+    # Field the changelist is ordered by, newest first, for the "older" link.
+    keyset_field: str
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = "nubank_django/change_list.html"
+
+    def get_changelist(self, request, **kwargs):
+        return StatementChangeList
+
+
+class CsvExportMixin:
+    """Actions streaming the selected statements as CSV, see `nubank_django.exports`."""
+
+    export_fields: tuple
+    actions = ["export_csv", "export_csv_gzip"]
+
+    def _export(self, queryset, compress: bool):
+        filename = f"{self.model._meta.model_name}-{timezone.now():%Y%m%d-%H%M%S}.csv"
+        return csv_export_response(queryset, self.export_fields, filename, compress)
+
+    @admin.action(description="Export selected statements as CSV")
+    def export_csv(self, request, queryset):
+        return self._export(queryset, compress=False)
+
+    @admin.action(description="Export selected statements as compressed CSV (.csv.gz)")
+    def export_csv_gzip(self, request, queryset):
+        return self._export(queryset, compress=True)
+
+
+class ImportJobActionMixin:
+    """Runs the changelist import action as a background job, showing its progress on the changelist."""
+
+    import_source: str
+
+    def enqueue_import(self, request):
+        try:
+            job = enqueue_import(self.import_source)
+        except ImportAlreadyRunning:
+            self.message_user(
+                request, "An import is already running, wait for it to finish.", messages.WARNING, fail_silently=True
+            )
+            return
+        if job.status == ImportJob.FAILED:
+            self.message_user(
+                request, f"Import failed: {job.error.splitlines()[-1]}", messages.ERROR, fail_silently=True
+            )
+        elif job.status == ImportJob.SUCCEEDED:
+            message = f"Import finished: {job.stats.get('inserted', 0)} new statements."
+            self.message_user(request, message, messages.SUCCESS, fail_silently=True)
+        else:
+            message = "Import started, refresh this page to follow its progress."
+            self.message_user(request, message, messages.INFO, fail_silently=True)
+
+    def changelist_view(self, request, extra_context=None):
+        job = get_latest_job(self.import_source)
+        if job and job.is_active:
+            self.message_user(request, f"{job}: {job.progress_display}.", messages.INFO, fail_silently=True)
+        return super().changelist_view(request, extra_context)
 
 
 @admin.register(CardStatement)
-class CardStatementAdmin(DjangoObjectActions, admin.ModelAdmin):
+class CardStatementAdmin(
+    LargeChangeListMixin,
+    StatementSearchMixin,
+    CsvExportMixin,
+    ImportJobActionMixin,
+    DjangoObjectActions,
+    admin.ModelAdmin,
+):
     list_display = ("description", "title", "time", "amount")
     search_fields = ("amount", "description", "title")
     list_filter = (
-        "title",
-        "source",
+        ("title", FacetListFilter),
+        ("source", FacetListFilter),
         ("time", DateRangeFilter),
     )
     fields = (
@@ -26,6 +122,18 @@ class CardStatementAdmin(DjangoObjectActions, admin.ModelAdmin):
     )
 
     changelist_actions = ["run_nubank_import"]
+    import_source = SyncCheckpoint.CARD_STATEMENTS
+    keyset_field = "time"
+    export_fields = (
+        "nubank_id",
+        "time",
+        "title",
+        "description",
+        "amount",
+        "amount_without_iof",
+        "category",
+        "source",
+    )
 
     def has_add_permission(self, request) -> bool:
         return False
@@ -37,17 +145,23 @@ class CardStatementAdmin(DjangoObjectActions, admin.ModelAdmin):
         return [f.name for f in self.model._meta.fields]
 
     def run_nubank_import(self, request, queryset):
-        # TODO: error handling with admin message
-        full_load_card_statements()
+        self.enqueue_import(request)
 
 
 @admin.register(AccountStatement)
-class AccountStatementAdmin(DjangoObjectActions, admin.ModelAdmin):
+class AccountStatementAdmin(
+    LargeChangeListMixin,
+    StatementSearchMixin,
+    CsvExportMixin,
+    ImportJobActionMixin,
+    DjangoObjectActions,
+    admin.ModelAdmin,
+):
     list_display = (
         "detail",
         "gql_typename",
         "post_date",
-        "account_name",
+        "counterparty",
         "amount",
     )
     search_fields = (
@@ -65,6 +179,19 @@ class AccountStatementAdmin(DjangoObjectActions, admin.ModelAdmin):
     )
 
     changelist_actions = ["run_nuconta_import"]
+    import_source = SyncCheckpoint.ACCOUNT_STATEMENTS
+    keyset_field = "post_date"
+    export_fields = (
+        "nubank_id",
+        "post_date",
+        "gql_typename",
+        "title",
+        "detail",
+        "amount",
+        "origin_account",
+        "destination_account",
+        "counterparty",
+    )
 
     def has_add_permission(self, request) -> bool:
         return False
@@ -76,5 +203,39 @@ class AccountStatementAdmin(DjangoObjectActions, admin.ModelAdmin):
         return super().get_queryset(request).order_by("-post_date")
 
     def run_nuconta_import(self, request, queryset):
-        # TODO: error handling with admin message
-        full_load_nuconta_statements()
+        self.enqueue_import(request)
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ("source", "status", "progress_display", "created_at", "finished_at")
+    list_filter = ("source", "status")
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+
+class ReadOnlySummaryAdmin(admin.ModelAdmin):
+    date_hierarchy = "month"
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+
+@admin.register(CardMonthlySummary)
+class CardMonthlySummaryAdmin(ReadOnlySummaryAdmin):
+    list_display = ("month", "title", "category", "total", "count")
+    list_filter = ("title", "category")
+
+
+@admin.register(AccountMonthlySummary)
+class AccountMonthlySummaryAdmin(ReadOnlySummaryAdmin):
+    list_display = ("month", "gql_typename", "counterparty", "inflow", "outflow", "count")
+    list_filter = ("gql_typename",)
+    search_fields = ("counterparty",)
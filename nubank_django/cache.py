@@ -0,0 +1,267 @@
+"""
+Chunked, compressed storage of raw Nubank feeds in Django's cache.
+
+A feed is split in chunks of `chunk_records` records, each one encoded and
+compressed on its own, so no cache item gets near memcached's 1MB limit. The feed
+key itself only holds a small manifest pointing to the chunk keys.
+
+Encoding is pluggable: "json" is always available, "orjson" and "msgpack" are used
+when the respective packages are installed.
+
+`FeedCache.fetch` is the single entry point used to read feeds through the cache:
+it applies the cache policy, serves stale feeds while refreshing them in the
+background, and keeps hit/miss/bytes counters per key.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.core.exceptions import ImproperlyConfigured
+
+from nubank_django.instrumentation import increment, stage
+
+try:
+    import orjson
+except ImportError:  # pragma: nocover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: nocover
+    msgpack = None
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+DEFAULT_CHUNK_RECORDS = 2000
+NUBANK_CACHE_TTL = 60 * 60 * 2  # 2 hours
+REFRESH_LOCK_TIMEOUT = 60 * 5
+
+_stats: Dict[str, Counter] = defaultdict(Counter)
+_stats_lock = threading.Lock()
+
+
+def _record(key: str, **increments: int) -> None:
+    with _stats_lock:
+        _stats[key].update(increments)
+    for counter, value in increments.items():
+        increment(f"cache_{counter}", value, key=key)
+
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hits, misses, stale hits, refreshes and bytes read/written for each feed key, since process start."""
+    with _stats_lock:
+        return {key: dict(counters) for key, counters in _stats.items()}
+
+
+def reset_cache_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def get_cache_policy() -> str:
+    """
+    The cache policy: "pull" reads feeds from the cache, "push" stores fetched feeds,
+    "push-pull" (default) does both and anything else bypasses the cache.
+    """
+    default_policy = os.getenv("NUBANK_CACHE_POLICY", "push-pull")
+    return getattr(settings, "NUBANK_CACHE_POLICY", default_policy)
+
+
+class Codec(NamedTuple):
+    encode: Callable[[list], bytes]
+    decode: Callable[[bytes], list]
+
+
+def _json_codec() -> Codec:
+    return Codec(
+        encode=lambda records: json.dumps(records, separators=(",", ":")).encode(),
+        decode=json.loads,
+    )
+
+
+def _orjson_codec() -> Codec:
+    if orjson is None:
+        raise ImproperlyConfigured("The 'orjson' feed cache codec requires the orjson package.")
+    return Codec(encode=orjson.dumps, decode=orjson.loads)
+
+
+def _msgpack_codec() -> Codec:
+    if msgpack is None:
+        raise ImproperlyConfigured("The 'msgpack' feed cache codec requires the msgpack package.")
+    return Codec(encode=msgpack.packb, decode=msgpack.unpackb)
+
+
+CODECS: Dict[str, Callable[[], Codec]] = {
+    "json": _json_codec,
+    "orjson": _orjson_codec,
+    "msgpack": _msgpack_codec,
+}
+
+COMPRESSIONS = {
+    "none": (lambda data: data, lambda data: data),
+    "zlib": (zlib.compress, zlib.decompress),
+}
+
+
+class FeedCache:
+    def __init__(
+        self,
+        codec: str = "json",
+        compression: str = "zlib",
+        chunk_records: int = DEFAULT_CHUNK_RECORDS,
+        timeout: Optional[int] = NUBANK_CACHE_TTL,
+        stale_after: Optional[int] = None,
+        backend=default_cache,
+    ):
+        if codec not in CODECS:
+            raise ImproperlyConfigured(f"Unknown feed cache codec '{codec}'.")
+        if compression not in COMPRESSIONS:
+            raise ImproperlyConfigured(f"Unknown feed cache compression '{compression}'.")
+
+        self.codec_name = codec
+        self.codec = CODECS[codec]()
+        self.compression = compression
+        self.compress, self.decompress = COMPRESSIONS[compression]
+        self.chunk_records = chunk_records
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.backend = backend
+
+    @staticmethod
+    def _chunk_key(key: str, token: str, index: int) -> str:
+        return f"{key}:{token}:{index}"
+
+    def set(self, key: str, records: List[dict], timeout: Optional[int] = None) -> int:
+        """Stores the feed, returning the amount of bytes written."""
+        timeout = self.timeout if timeout is None else timeout
+        previous = self.backend.get(key)
+        token = uuid.uuid4().hex
+        chunks = {}
+        for index, start in enumerate(range(0, len(records), self.chunk_records)):
+            encoded = self.codec.encode(records[start : start + self.chunk_records])
+            chunks[self._chunk_key(key, token, index)] = self.compress(encoded)
+
+        # Chunks go first: a reader never sees a manifest pointing at missing chunks.
+        self.backend.set_many(chunks, timeout)
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "codec": self.codec_name,
+            "compression": self.compression,
+            "token": token,
+            "chunks": len(chunks),
+            "records": len(records),
+            "stored_at": time.time(),
+        }
+        self.backend.set(key, manifest, timeout)
+        # Only once the new manifest is in place, so readers of the previous one are not left with missing chunks.
+        if isinstance(previous, dict) and "token" in previous:
+            self.backend.delete_many(
+                [self._chunk_key(key, previous["token"], index) for index in range(previous.get("chunks", 0))]
+            )
+
+        written = sum(len(chunk) for chunk in chunks.values())
+        _record(key, bytes_written=written)
+        return written
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        """Returns the cached feed, or None when it's missing, incomplete or in another format."""
+        manifest = self._get_manifest(key)
+        if manifest is None:
+            return None
+        return self._read_chunks(key, manifest)
+
+    def _get_manifest(self, key: str) -> Optional[dict]:
+        manifest = self.backend.get(key)
+        if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+            return None
+
+        if manifest["codec"] != self.codec_name or manifest["compression"] != self.compression:
+            logger.info(f"Ignoring cache for '{key}' stored with different settings.")
+            return None
+        return manifest
+
+    def _read_chunks(self, key: str, manifest: dict) -> Optional[List[dict]]:
+        chunk_keys = [self._chunk_key(key, manifest["token"], index) for index in range(manifest["chunks"])]
+        chunks = self.backend.get_many(chunk_keys)
+        if len(chunks) != len(chunk_keys):
+            logger.warning(f"Missing chunks for '{key}', treating as a cache miss.")
+            return None
+
+        records = []
+        with stage("deserialize", key=key) as metrics:
+            for chunk_key in chunk_keys:
+                records.extend(self.codec.decode(self.decompress(chunks[chunk_key])))
+            metrics.rows = len(records)
+        _record(key, bytes_read=sum(len(chunk) for chunk in chunks.values()))
+        return records
+
+    def _is_stale(self, manifest: dict) -> bool:
+        return self.stale_after is not None and time.time() - manifest["stored_at"] > self.stale_after
+
+    def fetch(self, key: str, fetch_feed: Callable[[], List[dict]], cache_policy: Optional[str] = None) -> List[dict]:
+        """
+        Returns the feed under `key`, calling `fetch_feed` when it's not cached.
+
+        Feeds older than `stale_after` seconds are still served, while a background
+        thread fetches and stores a fresh copy for the next read.
+        """
+        cache_policy = cache_policy or get_cache_policy()
+
+        if "pull" in cache_policy:
+            manifest = self._get_manifest(key)
+            cached_feed = self._read_chunks(key, manifest) if manifest else None
+            if cached_feed:
+                logger.info(f"Cache hit for '{key}'.")
+                if self._is_stale(manifest):
+                    _record(key, stale_hits=1)
+                    self.revalidate(key, fetch_feed)
+                else:
+                    _record(key, hits=1)
+                return cached_feed
+
+        _record(key, misses=1)
+        feed = fetch_feed()
+        if "push" in cache_policy:
+            logger.info(f"Setting cache for '{key}'.")
+            self.set(key, feed)
+        return feed
+
+    def revalidate(self, key: str, fetch_feed: Callable[[], List[dict]], background: bool = True) -> None:
+        """Fetches and stores a fresh copy of the feed, unless another refresh of it is running."""
+        lock_key = f"{key}:refreshing"
+        if not self.backend.add(lock_key, 1, REFRESH_LOCK_TIMEOUT):
+            return
+
+        def _refresh():
+            try:
+                self.set(key, fetch_feed())
+                _record(key, refreshes=1)
+            except Exception:
+                logger.exception(f"Could not refresh cache for '{key}'.")
+            finally:
+                self.backend.delete(lock_key)
+
+        if background:
+            threading.Thread(target=_refresh, name=f"refresh-{key}", daemon=True).start()
+        else:
+            _refresh()
+
+
+def get_feed_cache() -> FeedCache:
+    return FeedCache(
+        codec=getattr(settings, "NUBANK_CACHE_CODEC", "json"),
+        compression=getattr(settings, "NUBANK_CACHE_COMPRESSION", "zlib"),
+        chunk_records=getattr(settings, "NUBANK_CACHE_CHUNK_RECORDS", DEFAULT_CHUNK_RECORDS),
+        timeout=getattr(settings, "NUBANK_CACHE_TTL", NUBANK_CACHE_TTL),
+        stale_after=getattr(settings, "NUBANK_CACHE_STALE_AFTER", None),
+    )
@@ -0,0 +1,190 @@
+import datetime
+import logging
+from typing import Callable, Iterable, Iterator
+
+from django.utils.dateparse import parse_date, parse_datetime
+
+from nubank_django.models import SyncCheckpoint
+
+
+logger = logging.getLogger(__name__)
+
+RecordTime = Callable[[dict], datetime.datetime]
+RESUME_FIELDS = ("committed_from", "committed_from_ids", "committed_until", "committed_until_ids")
+
+
+def card_statement_time(raw_statement: dict) -> datetime.datetime:
+    return parse_datetime(raw_statement["time"])
+
+
+def account_statement_time(raw_statement: dict) -> datetime.datetime:
+    post_date = parse_date(raw_statement["postDate"])
+    return datetime.datetime.combine(post_date, datetime.time.min, tzinfo=datetime.timezone.utc)
+
+
+def get_checkpoint(source: str) -> SyncCheckpoint:
+    checkpoint, _ = SyncCheckpoint.objects.get_or_create(source=source)
+    return checkpoint
+
+
+def records_after_checkpoint(
+    raw_records: Iterable[dict], checkpoint: SyncCheckpoint, record_time: RecordTime
+) -> Iterator[dict]:
+    """
+    Yields the records that are newer than the checkpoint.
+
+    Nubank feeds are sorted newest first, so iteration stops at the first record
+    older than the high-water mark: everything after it has been synced already.
+    """
+    high_water_mark = checkpoint.high_water_mark
+    boundary_ids = set(checkpoint.boundary_ids)
+
+    for raw_record in raw_records:
+        if high_water_mark is None:
+            yield raw_record
+            continue
+
+        try:
+            current_time = record_time(raw_record)
+        except (KeyError, TypeError, ValueError):
+            # Malformed records are left for the parser to reject.
+            yield raw_record
+            continue
+
+        if current_time < high_water_mark:
+            logger.info("Reached already synced records.", extra={"source": checkpoint.source})
+            return
+
+        if current_time == high_water_mark and raw_record.get("id") in boundary_ids:
+            continue
+
+        yield raw_record
+
+
+def records_not_committed(
+    raw_records: Iterable[dict], checkpoint: SyncCheckpoint, record_time: RecordTime
+) -> Iterator[dict]:
+    """
+    Skips the records committed by a previous load of the same (newest first) feed that
+    didn't finish, so it resumes after its last committed chunk. Records newer than that
+    load's are still yielded.
+    """
+    if checkpoint.committed_from is None:
+        yield from raw_records
+        return
+
+    committed_from, committed_until = checkpoint.committed_from, checkpoint.committed_until
+    from_ids, until_ids = set(checkpoint.committed_from_ids), set(checkpoint.committed_until_ids)
+    skipped = 0
+    for raw_record in raw_records:
+        try:
+            current_time = record_time(raw_record)
+        except (KeyError, TypeError, ValueError):
+            yield raw_record
+            continue
+
+        if (
+            committed_until < current_time < committed_from
+            or (current_time == committed_from and raw_record.get("id") in from_ids)
+            or (current_time == committed_until and raw_record.get("id") in until_ids)
+        ):
+            skipped += 1
+            continue
+
+        if skipped:
+            logger.info("Resumed after committed records.", extra={"source": checkpoint.source, "skipped": skipped})
+            skipped = 0
+        yield raw_record
+
+
+class CheckpointAdvancer:
+    """
+    Works out the checkpoint's next position from the records of a (newest first)
+    feed as they stream by, so the feed doesn't have to be kept around or read twice.
+
+    It also keeps the span of the feed read so far, which `save_progress` records after
+    every committed chunk, for `records_not_committed` to resume an interrupted load.
+    """
+
+    def __init__(self, checkpoint: SyncCheckpoint, record_time: RecordTime):
+        self.checkpoint = checkpoint
+        self.record_time = record_time
+        self.newest_time = checkpoint.high_water_mark
+        self.boundary_ids = set(checkpoint.boundary_ids)
+        self.done = False
+        self.read_from, self.read_from_ids = None, set()
+        self.read_until, self.read_until_ids = None, set()
+
+    def _extend_read_span(self, current_time: datetime.datetime, record_id) -> None:
+        if self.read_from is None:
+            self.read_from = current_time
+        if current_time == self.read_from:
+            self.read_from_ids.add(record_id)
+
+        if current_time != self.read_until:
+            self.read_until, self.read_until_ids = current_time, set()
+        self.read_until_ids.add(record_id)
+
+    def observe(self, raw_record: dict) -> None:
+        try:
+            current_time = self.record_time(raw_record)
+        except (KeyError, TypeError, ValueError):
+            return
+
+        self._extend_read_span(current_time, raw_record.get("id"))
+        if self.done:
+            return
+
+        if self.newest_time is not None and current_time < self.newest_time:
+            # Every following record is older still.
+            self.done = True
+        elif self.newest_time is None or current_time > self.newest_time:
+            self.newest_time = current_time
+            self.boundary_ids = {raw_record["id"]}
+        else:
+            self.boundary_ids.add(raw_record["id"])
+
+    def track(self, raw_records: Iterable[dict]) -> Iterator[dict]:
+        for raw_record in raw_records:
+            self.observe(raw_record)
+            yield raw_record
+
+    def save_progress(self) -> None:
+        """Records the span read so far, to be called once everything read has been committed."""
+        if self.read_from is None:
+            return
+
+        checkpoint = self.checkpoint
+        checkpoint.committed_from, checkpoint.committed_from_ids = self.read_from, sorted(self.read_from_ids)
+        checkpoint.committed_until, checkpoint.committed_until_ids = self.read_until, sorted(self.read_until_ids)
+        checkpoint.save(update_fields=[*RESUME_FIELDS, "updated_at"])
+
+    def save(self) -> None:
+        checkpoint = self.checkpoint
+        if (
+            self.newest_time == checkpoint.high_water_mark
+            and self.boundary_ids == set(checkpoint.boundary_ids)
+            and checkpoint.committed_from is None
+        ):
+            return
+
+        checkpoint.high_water_mark = self.newest_time
+        checkpoint.boundary_ids = sorted(self.boundary_ids)
+        # The load finished, nothing left to resume.
+        checkpoint.committed_from, checkpoint.committed_from_ids = None, []
+        checkpoint.committed_until, checkpoint.committed_until_ids = None, []
+        checkpoint.save()
+        logger.info(
+            "Advanced sync checkpoint.",
+            extra={"source": checkpoint.source, "high_water_mark": self.newest_time},
+        )
+
+
+def advance_checkpoint(checkpoint: SyncCheckpoint, raw_records: Iterable[dict], record_time: RecordTime) -> None:
+    """Moves the checkpoint to the newest record of a (newest first) feed."""
+    advancer = CheckpointAdvancer(checkpoint, record_time)
+    for raw_record in raw_records:
+        advancer.observe(raw_record)
+        if advancer.done:
+            break
+    advancer.save()
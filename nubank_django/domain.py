@@ -1,63 +1,313 @@
-import json
 import logging
-from decimal import Decimal
-from typing import List, Optional
-
-from django.core.cache import cache
-
-from nubank_django.models import (
-    CREDIT_STATEMENT_TYPES,
-    DEBIT_STATEMENT_TYPES,
-    AccountStatement,
-    CardStatement,
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sized, Tuple, Type, TypeVar
+from uuid import UUID
+
+from django.conf import settings
+from django.db import connection, connections, models, router, transaction
+
+from nubank_django.checkpoints import (
+    CheckpointAdvancer,
+    account_statement_time,
+    card_statement_time,
+    get_checkpoint,
+    records_after_checkpoint,
+    records_not_committed,
 )
+from nubank_django.facets import record_facet_values
+from nubank_django.instrumentation import StageMetrics, increment, stage
+from nubank_django.models import AccountStatement, CardStatement, SyncCheckpoint
 from nubank_django.nu import get_authed_nu_client
-from nubank_django.utils import amount_to_decimal
+from nubank_django.summaries import apply_statement_changes
+from nubank_django.utils import amount_to_decimal, cents_to_decimal
+from nubank_django.validation import build_field_specs, iter_validated_instances
 
 
 logger = logging.getLogger(__name__)
-NUBANK_CACHE_TTL = 60 * 60 * 2  # 2 hours
+# Keeps `nubank_id IN (...)` lookups well under SQLite's bound parameters limit.
+NUBANK_ID_LOOKUP_CHUNK_SIZE = 500
+# Statements per chunk, each persisted in its own transaction.
+DEFAULT_BATCH_SIZE = 1000
+# Upper bound of rows per INSERT, for backends without a bound parameters limit (PostgreSQL,
+# MySQL) where a whole chunk would otherwise be a single, arbitrarily large, statement.
+NUBANK_INSERT_BATCH_SIZE = 1000
+# Rows per UPDATE issued by upserts, each one a CASE over the batch's primary keys.
+UPSERT_BATCH_SIZE = 500
+
+CARD_STATEMENT_SPECS = build_field_specs(CardStatement)
+ACCOUNT_STATEMENT_SPECS = build_field_specs(AccountStatement)
+
+StatementT = TypeVar("StatementT", CardStatement, AccountStatement)
+MODEL_SOURCES = {
+    CardStatement: SyncCheckpoint.CARD_STATEMENTS,
+    AccountStatement: SyncCheckpoint.ACCOUNT_STATEMENTS,
+}
+
+
+class PersistResult(NamedTuple):
+    created: list
+    updated: list
+
+
+def _as_uuid(value) -> UUID:
+    return value if isinstance(value, UUID) else UUID(str(value))
+
+
+def _batched(iterable: Iterable, batch_size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+@dataclass
+class LoadStats:
+    """Record counts and seconds spent per stage of a load."""
+
+    source: str = ""
+    fetched: int = 0
+    considered: int = 0
+    parsed: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+    error: Optional[BaseException] = None
+
+    @property
+    def rejected(self) -> int:
+        return self.considered - self.parsed
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        """Statements parsed and persisted per second."""
+        seconds = self.timings.get("parse", 0.0) + self.timings.get("persist", 0.0)
+        return self.parsed / seconds if seconds else None
+
+    def batch_done(self) -> None:
+        """Called after every persisted batch; subclasses use it to report progress."""
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[StageMetrics]:
+        """Times a stage, also reporting it to the instrumentation sinks."""
+        start = time.perf_counter()
+        try:
+            with stage(name, source=self.source) as metrics:
+                yield metrics
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def report_counts(self) -> None:
+        for outcome in ("fetched", "parsed", "rejected", "inserted", "updated", "skipped"):
+            increment("statements", getattr(self, outcome), source=self.source, outcome=outcome)
+
+    def count_fetched(self, records: Iterable[dict]) -> Iterable[dict]:
+        """Counts a feed's records: all at once when it's a list, as they're read when it's a stream."""
+        if isinstance(records, Sized):
+            self.fetched += len(records)
+            return records
+        return self._count_fetched_stream(records)
+
+    def _count_fetched_stream(self, records: Iterable[dict]) -> Iterator[dict]:
+        for record in records:
+            self.fetched += 1
+            yield record
+
+    def count_considered(self, records: Iterable[dict]) -> Iterator[dict]:
+        for record in records:
+            self.considered += 1
+            yield record
+
+    def as_dict(self) -> dict:
+        return {
+            "fetched": self.fetched,
+            "parsed": self.parsed,
+            "rejected": self.rejected,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "rows_per_second": self.rows_per_second,
+            "timings": dict(self.timings),
+        }
+
+
+def _load_in_batches(
+    stats: LoadStats,
+    statements: Iterable[StatementT],
+    batch_size: int,
+    persist: Callable[[List[StatementT]], PersistResult],
+    save_progress: Optional[Callable[[], None]] = None,
+) -> None:
+    """
+    Persists the statements in chunks of `batch_size`, each one in its own transaction.
+    After every chunk, `save_progress` records how far the feed has been read, so a
+    failed load resumes from its last committed chunk.
+    """
+    batches = _batched(statements, batch_size)
+    while True:
+        # Statements are parsed lazily, while the batch is being filled.
+        with stats.timer("parse") as metrics:
+            batch = next(batches, None)
+            metrics.rows = len(batch or ())
+        if batch is None:
+            break
+
+        with stats.timer("persist") as metrics:
+            result = persist(batch)
+            metrics.rows = len(batch)
+        stats.parsed += len(batch)
+        stats.inserted += len(result.created)
+        stats.updated += len(result.updated)
+        stats.skipped += len(batch) - len(result.created) - len(result.updated)
+        # Saved after the chunk's commit: when interrupted in between, the chunk is only
+        # deduplicated once more on the next run.
+        if save_progress:
+            save_progress()
+        stats.batch_done()
+
+
+def _existing_fingerprints(model: Type[models.Model], candidate_ids: List[UUID]) -> Dict[UUID, Tuple[int, str]]:
+    """
+    Maps the candidate ids already stored to their (pk, fingerprint), never scanning the
+    whole table.
+    """
+    existing = {}
+    for start in range(0, len(candidate_ids), NUBANK_ID_LOOKUP_CHUNK_SIZE):
+        chunk = candidate_ids[start : start + NUBANK_ID_LOOKUP_CHUNK_SIZE]
+        rows = model.objects.filter(nubank_id__in=chunk).values_list("nubank_id", "pk", "fingerprint")
+        existing.update((nubank_id, (pk, fingerprint)) for nubank_id, pk, fingerprint in rows)
+    return existing
+
+
+def insert_batch_size(model: Type[models.Model], objs: List[models.Model]) -> int:
+    """Rows per INSERT: as many as the backend's bound parameters limit allows, up to NUBANK_INSERT_BATCH_SIZE."""
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    limit = getattr(settings, "NUBANK_INSERT_BATCH_SIZE", NUBANK_INSERT_BATCH_SIZE)
+    write_connection = connections[router.db_for_write(model)]
+    return max(min(write_connection.ops.bulk_batch_size(fields, objs), limit), 1)
+
+
+def _persist_statements(model: Type[StatementT], statements: Iterable[StatementT], upsert: bool) -> PersistResult:
+    """
+    Creates the statements not stored yet. With `upsert`, stored statements whose
+    fingerprint changed are updated too, so the work done is proportional to the
+    changes, not to the batch. Repeated ids within the batch are dropped.
+
+    Monthly summaries and list filter facets are updated in the same transaction, from
+    these statements only.
+    """
+    source = MODEL_SOURCES[model]
+    # The lookup is part of the transaction, so summaries and facets only count the
+    # statements it found missing. The unique index on nubank_id settles any race with
+    # an import that hasn't committed yet.
+    with transaction.atomic():
+        with stage("dedup", source=source) as metrics:
+            statements_by_id = {}
+            for statement in statements:
+                statement.nubank_id = _as_uuid(statement.nubank_id)
+                statement.fingerprint = statement.compute_fingerprint()
+                statement.search_text = statement.compute_search_text()
+                statements_by_id.setdefault(statement.nubank_id, statement)
+
+            existing = _existing_fingerprints(model, list(statements_by_id))
+            to_create, to_update = [], []
+            for nubank_id, statement in statements_by_id.items():
+                if nubank_id not in existing:
+                    to_create.append(statement)
+                elif upsert and existing[nubank_id][1] != statement.fingerprint:
+                    statement.pk = existing[nubank_id][0]
+                    to_update.append(statement)
+            metrics.rows = len(statements_by_id)
+
+        with stage("bulk_create", source=source) as metrics:
+            model.objects.bulk_create(to_create, batch_size=insert_batch_size(model, to_create), ignore_conflicts=True)
+            metrics.rows = len(to_create)
+
+        previous_versions = []
+        if to_update:
+            with stage("bulk_update", source=source) as metrics:
+                previous_versions = model.objects.in_bulk([statement.pk for statement in to_update]).values()
+                update_fields = [*model.FINGERPRINT_FIELDS, *model.DERIVED_FIELDS, "fingerprint", "search_text"]
+                model.objects.bulk_update(to_update, update_fields, batch_size=UPSERT_BATCH_SIZE)
+                metrics.rows = len(to_update)
+
+        with stage("aggregates", source=source):
+            apply_statement_changes(model, created=to_create, added=to_update, removed=previous_versions)
+            record_facet_values(model, [*to_create, *to_update], removed=previous_versions)
+    return PersistResult(to_create, to_update)
+
+
+def persist_card_statements(parsed_card_statements: List[CardStatement], upsert: bool = False) -> PersistResult:
+    """Stores the statements not stored yet and, with `upsert`, updates the ones changed upstream."""
+    return _persist_statements(CardStatement, parsed_card_statements, upsert)
+
+
+def _card_statement_values(raw_card_statement: dict) -> dict:
+    return dict(
+        nubank_id=raw_card_statement["id"],
+        account=raw_card_statement.get("account"),
+        amount=cents_to_decimal(raw_card_statement["amount"]),
+        amount_without_iof=cents_to_decimal(raw_card_statement.get("amount_without_iof", 0)) or None,
+        category=raw_card_statement["category"],
+        description=raw_card_statement["description"],
+        details=raw_card_statement["details"],
+        source=raw_card_statement.get("source"),
+        time=raw_card_statement["time"],
+        title=raw_card_statement["title"],
+        tokenized=raw_card_statement.get("tokenized"),
+    )
 
 
-def persist_card_statements(parsed_card_statements: List[CardStatement]):
-    existing_card_statements_ids = CardStatement.objects.values_list("nubank_id", flat=True)
-    card_statements_to_create = []
-    for statement in parsed_card_statements:
-        if statement.nubank_id in existing_card_statements_ids:
-            continue
+def _log_rejects(rejects: Counter, source: str) -> None:
+    for reason, count in rejects.items():
+        increment("rejects", count, source=source, reason=reason)
+    if rejects:
+        logger.warning(
+            "Rejected statements during bulk validation.",
+            extra={"rejected_count": sum(rejects.values()), "rejects": dict(rejects)},
+        )
 
-        card_statements_to_create.append(statement)
 
-    CardStatement.objects.bulk_create(card_statements_to_create)
+def iter_card_statements(raw_card_statements: Iterable[dict], bulk_validation: bool = False) -> Iterator[CardStatement]:
+    """
+    Lazily parses card statements, skipping (and logging) the ones that can't be parsed.
 
+    With `bulk_validation`, fields are checked against precomputed metadata instead of
+    `clean_fields()`, and rejects are logged once, in aggregate.
+    """
+    if bulk_validation:
+        rejects = Counter()
+        yield from iter_validated_instances(
+            CardStatement, raw_card_statements, _card_statement_values, CARD_STATEMENT_SPECS, rejects
+        )
+        _log_rejects(rejects, SyncCheckpoint.CARD_STATEMENTS)
+        return
 
-def parse_card_statements(raw_card_statements: List[dict]) -> List[CardStatement]:
-    logger.info(
-        "Starting parsing of card statements.",
-        extra={"card_statements_count": len(raw_card_statements)},
-    )
-    parsed_card_statements = []
     for raw_card_statement in raw_card_statements:
         try:
-            parsed_card_statement = CardStatement(
-                nubank_id=raw_card_statement["id"],
-                account=raw_card_statement.get("account"),
-                amount=amount_to_decimal(raw_card_statement["amount"] / 100),
-                amount_without_iof=amount_to_decimal(raw_card_statement.get("amount_without_iof", 0) / 100) or None,
-                category=raw_card_statement["category"],
-                description=raw_card_statement["description"],
-                details=raw_card_statement["details"],
-                source=raw_card_statement.get("source"),
-                time=raw_card_statement["time"],
-                title=raw_card_statement["title"],
-                tokenized=raw_card_statement.get("tokenized"),
-            )
+            parsed_card_statement = CardStatement(**_card_statement_values(raw_card_statement))
 
             parsed_card_statement.clean_fields()
             parsed_card_statement.clean()
-            parsed_card_statements.append(parsed_card_statement)
-        except Exception:
+        except Exception as exc:
             logger.exception("Could not parse statement.", extra={"statement": raw_card_statement})
+            increment("rejects", source=SyncCheckpoint.CARD_STATEMENTS, reason=type(exc).__name__)
+            continue
+
+        yield parsed_card_statement
+
+
+def parse_card_statements(raw_card_statements: List[dict], bulk_validation: bool = False) -> List[CardStatement]:
+    logger.info(
+        "Starting parsing of card statements.",
+        extra={"card_statements_count": len(raw_card_statements)},
+    )
+    parsed_card_statements = list(iter_card_statements(raw_card_statements, bulk_validation))
 
     logger.info(
         "Parsed card statements.",
@@ -66,68 +316,99 @@ def parse_card_statements(raw_card_statements: List[dict]) -> List[CardStatement
     return parsed_card_statements
 
 
-def get_raw_card_statements(cache_policy: str = "push-pull") -> List[dict]:
-    logger.info("Starting to get raw card statement.", extra={cache_policy: cache_policy})
-
-    CARD_STATEMENTS_CACHE_KEY = "card_statements.json"
-
-    cached_statements = cache.get(CARD_STATEMENTS_CACHE_KEY)
-    if "pull" in cache_policy and cached_statements:
-        logger.info(f"Cache hit for '{CARD_STATEMENTS_CACHE_KEY}'.")
-        return json.loads(cached_statements)
+def get_raw_card_statements(cache_policy: Optional[str] = None) -> List[dict]:
+    logger.info("Starting to get raw card statement.", extra={"cache_policy": cache_policy})
 
     nu = get_authed_nu_client()
-    raw_statements = nu.get_card_statements()
+    raw_statements = nu.get_card_statements(cache_policy=cache_policy)
 
-    if "push" in cache_policy:
-        logger.info(f"Setting cache for '{CARD_STATEMENTS_CACHE_KEY}'.")
-        cache.set(CARD_STATEMENTS_CACHE_KEY, json.dumps(raw_statements), NUBANK_CACHE_TTL)
+    logger.info("Returning card statements", extra={"statements_count": len(raw_statements)})
     return raw_statements
 
 
-def full_load_card_statements():
-    raw = get_raw_card_statements()
-    parsed = parse_card_statements(raw)
-    persist_card_statements(parsed)
+def load_card_statements(
+    raw: Iterable[dict],
+    incremental: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    bulk_validation: bool = False,
+    upsert: bool = False,
+    stats: Optional[LoadStats] = None,
+    resume: bool = True,
+) -> LoadStats:
+    """
+    Parses and persists already fetched card statements in batches of `batch_size`, so
+    memory stays flat regardless of history size. When `incremental`, only statements
+    newer than the last sync are handled. With `upsert`, stored statements changed
+    upstream are updated. `raw` may be a stream, it's read only once.
+
+    Each batch is committed on its own; when a load fails, the next one skips the
+    statements it already committed. Feeds other than the API's, e.g. archives, are
+    loaded with `resume=False`: they neither skip nor record committed statements.
+    """
+    stats = stats or LoadStats()
+    stats.source = SyncCheckpoint.CARD_STATEMENTS
+    checkpoint = get_checkpoint(SyncCheckpoint.CARD_STATEMENTS)
+    advancer = CheckpointAdvancer(checkpoint, card_statement_time)
+    records = advancer.track(stats.count_fetched(raw))
+    if incremental:
+        records = records_after_checkpoint(records, checkpoint, card_statement_time)
+    if resume:
+        records = records_not_committed(records, checkpoint, card_statement_time)
+
+    _load_in_batches(
+        stats,
+        iter_card_statements(stats.count_considered(records), bulk_validation),
+        batch_size,
+        partial(persist_card_statements, upsert=upsert),
+        advancer.save_progress if resume else None,
+    )
+    advancer.save()
+    stats.report_counts()
+    return stats
+
+
+def full_load_card_statements(
+    incremental: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    bulk_validation: bool = False,
+    upsert: bool = False,
+    stats: Optional[LoadStats] = None,
+) -> LoadStats:
+    stats = stats or LoadStats()
+    stats.source = SyncCheckpoint.CARD_STATEMENTS
+    with stats.timer("fetch") as metrics:
+        raw = get_raw_card_statements()
+        metrics.rows = len(raw)
+    return load_card_statements(raw, incremental, batch_size, bulk_validation, upsert, stats)
 
 
-def get_raw_account_statements(cache_policy: str = "push-pull") -> List[dict]:
-    logger.info("Starting to get raw nuconta statement.", extra={cache_policy: cache_policy})
+def get_raw_account_statements(cache_policy: Optional[str] = None) -> List[dict]:
+    logger.info("Starting to get raw nuconta statement.", extra={"cache_policy": cache_policy})
 
     nu = get_authed_nu_client()
-    raw_statements = nu.get_account_feed_with_pix_mapping()
+    raw_statements = nu.get_account_feed_with_pix_mapping(cache_policy=cache_policy)
 
     logger.info("Returning nuconta statements", extra={"statements_count": len(raw_statements)})
     return raw_statements
 
 
-def persist_parsed_account_statements(
-    parsed_statements: List[AccountStatement],
-) -> None:
+def persist_parsed_account_statements(parsed_statements: List[AccountStatement], upsert: bool = False) -> PersistResult:
+    """Stores the statements not stored yet and, with `upsert`, updates the ones changed upstream."""
     logger.info(
         "Started persisting statements.",
         extra={"parsed_statements_count": len(parsed_statements)},
     )
-    existing_statement_ids = AccountStatement.objects.values_list("nubank_id", flat=True)
-
-    statements_to_create = []
-    statements_already_existing = []
-    for statement in parsed_statements:
-        if statement.nubank_id in existing_statement_ids:
-            statements_already_existing.append(statement)
-            continue
-
-        statements_to_create.append(statement)
-
-    AccountStatement.objects.bulk_create(statements_to_create)
+    result = _persist_statements(AccountStatement, parsed_statements, upsert)
 
     logger.info(
         "Persisted statements to database.",
         extra={
-            "statements_count": len(statements_to_create),
-            "already_existed_count": len(statements_already_existing),
+            "statements_count": len(result.created),
+            "updated_count": len(result.updated),
+            "already_existed_count": len(parsed_statements) - len(result.created) - len(result.updated),
         },
     )
+    return result
 
 
 def _account_name_from_statement(statement: dict) -> Optional[str]:
@@ -143,40 +424,177 @@ def _account_name_from_statement(statement: dict) -> Optional[str]:
     return account_name
 
 
-def parse_account_statements(raw_statements: List[dict]) -> List[AccountStatement]:
-    logger.info(
-        "Starting parsing of statements",
-        extra={"statements_count": len(raw_statements)},
+def _account_statement_values(raw_statement: dict) -> dict:
+    values = dict(
+        nubank_id=raw_statement["id"],
+        amount=amount_to_decimal(raw_statement["amount"]),
+        detail=raw_statement["detail"],
+        post_date=raw_statement["postDate"],
+        title=raw_statement["title"],
+        gql_typename=raw_statement["__typename"],
     )
-    parsed_statements = []
+
+    # Mirrors AccountStatement.is_transfer_out/is_transfer_in.
+    if "TransferOutEvent" in values["gql_typename"]:
+        values["destination_account"] = _account_name_from_statement(raw_statement)
+    elif values["gql_typename"] == "TransferInEvent":
+        values["origin_account"] = _account_name_from_statement(raw_statement)
+    # Stored AccountStatement.account_name.
+    values["counterparty"] = values.get("destination_account") or values.get("origin_account") or ""
+    return values
+
+
+def iter_account_statements(
+    raw_statements: Iterable[dict], bulk_validation: bool = False
+) -> Iterator[AccountStatement]:
+    """
+    Lazily parses NuConta statements, skipping (and logging) the ones that can't be parsed.
+
+    With `bulk_validation`, fields are checked against precomputed metadata instead of
+    `clean_fields()`, and rejects are logged once, in aggregate.
+    """
+    if bulk_validation:
+        rejects = Counter()
+        yield from iter_validated_instances(
+            AccountStatement, raw_statements, _account_statement_values, ACCOUNT_STATEMENT_SPECS, rejects
+        )
+        _log_rejects(rejects, SyncCheckpoint.ACCOUNT_STATEMENTS)
+        return
+
     for raw_statement in raw_statements:
         try:
-            parsed_statement = AccountStatement(
-                nubank_id=raw_statement["id"],
-                amount=amount_to_decimal(raw_statement["amount"]),
-                detail=raw_statement["detail"],
-                post_date=raw_statement["postDate"],
-                title=raw_statement["title"],
-                gql_typename=raw_statement["__typename"],
-            )
-
-            if parsed_statement.is_transfer_out:
-                parsed_statement.destination_account = _account_name_from_statement(raw_statement)
-            elif parsed_statement.is_transfer_in:
-                parsed_statement.origin_account = _account_name_from_statement(raw_statement)
+            parsed_statement = AccountStatement(**_account_statement_values(raw_statement))
 
             # uniqueness is checked before persistence attempts, not here.
             parsed_statement.clean_fields()
             parsed_statement.clean()
-            parsed_statements.append(parsed_statement)
-        except Exception:
+        except Exception as exc:
             logger.exception("Could not parse statement.", extra={"statement": raw_statement})
+            increment("rejects", source=SyncCheckpoint.ACCOUNT_STATEMENTS, reason=type(exc).__name__)
+            continue
+
+        yield parsed_statement
+
+
+def parse_account_statements(raw_statements: List[dict], bulk_validation: bool = False) -> List[AccountStatement]:
+    logger.info(
+        "Starting parsing of statements",
+        extra={"statements_count": len(raw_statements)},
+    )
+    parsed_statements = list(iter_account_statements(raw_statements, bulk_validation))
 
     logger.info("Parsed statements.", extra={"parsed_statements_count": len(parsed_statements)})
     return parsed_statements
 
 
-def full_load_nuconta_statements():
-    raw = get_raw_account_statements()
-    parsed = parse_account_statements(raw)
-    persist_parsed_account_statements(parsed)
+def load_nuconta_statements(
+    raw: Iterable[dict],
+    incremental: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    bulk_validation: bool = False,
+    upsert: bool = False,
+    stats: Optional[LoadStats] = None,
+    resume: bool = True,
+) -> LoadStats:
+    """
+    Parses and persists already fetched NuConta statements in batches of `batch_size`, so
+    memory stays flat regardless of history size. When `incremental`, only statements
+    newer than the last sync are handled. With `upsert`, stored statements changed
+    upstream are updated. `raw` may be a stream, it's read only once.
+
+    Each batch is committed on its own; when a load fails, the next one skips the
+    statements it already committed. Feeds other than the API's, e.g. archives, are
+    loaded with `resume=False`: they neither skip nor record committed statements.
+    """
+    stats = stats or LoadStats()
+    stats.source = SyncCheckpoint.ACCOUNT_STATEMENTS
+    checkpoint = get_checkpoint(SyncCheckpoint.ACCOUNT_STATEMENTS)
+    advancer = CheckpointAdvancer(checkpoint, account_statement_time)
+    records = advancer.track(stats.count_fetched(raw))
+    if incremental:
+        records = records_after_checkpoint(records, checkpoint, account_statement_time)
+    if resume:
+        records = records_not_committed(records, checkpoint, account_statement_time)
+
+    _load_in_batches(
+        stats,
+        iter_account_statements(stats.count_considered(records), bulk_validation),
+        batch_size,
+        partial(persist_parsed_account_statements, upsert=upsert),
+        advancer.save_progress if resume else None,
+    )
+    advancer.save()
+    stats.report_counts()
+    return stats
+
+
+def full_load_nuconta_statements(
+    incremental: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    bulk_validation: bool = False,
+    upsert: bool = False,
+    stats: Optional[LoadStats] = None,
+) -> LoadStats:
+    stats = stats or LoadStats()
+    stats.source = SyncCheckpoint.ACCOUNT_STATEMENTS
+    with stats.timer("fetch") as metrics:
+        raw = get_raw_account_statements()
+        metrics.rows = len(raw)
+    return load_nuconta_statements(raw, incremental, batch_size, bulk_validation, upsert, stats)
+
+
+SYNC_SOURCES = {
+    SyncCheckpoint.CARD_STATEMENTS: (get_raw_card_statements, load_card_statements),
+    SyncCheckpoint.ACCOUNT_STATEMENTS: (get_raw_account_statements, load_nuconta_statements),
+}
+
+
+def _fetch_in_thread(fetch_raw: Callable[[], List[dict]], source: str) -> Tuple[List[dict], float]:
+    start = time.perf_counter()
+    try:
+        with stage("fetch", source=source) as metrics:
+            raw = fetch_raw()
+            metrics.rows = len(raw)
+        return raw, time.perf_counter() - start
+    finally:
+        # Cache backends may open DB connections, which are per thread.
+        connections.close_all()
+
+
+def full_sync(
+    sources: Optional[Iterable[str]] = None,
+    incremental: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    bulk_validation: bool = False,
+    upsert: bool = False,
+) -> Dict[str, LoadStats]:
+    """
+    Syncs card and NuConta statements, fetching all feeds concurrently.
+
+    Each feed is parsed and persisted, on the calling thread, as soon as it arrives,
+    while the remaining ones are still downloading. A failure in one source is logged
+    and kept in its stats' `error`, without affecting the others.
+    """
+    sources = list(sources or SYNC_SOURCES)
+    results = {source: LoadStats() for source in sources}
+    # Authenticating up front lets all fetches share the same session.
+    get_authed_nu_client()
+
+    with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="nubank-fetch") as executor:
+        futures = {executor.submit(_fetch_in_thread, SYNC_SOURCES[source][0], source): source for source in sources}
+        for future in as_completed(futures):
+            source = futures[future]
+            stats = results[source]
+            # When already inside a transaction, a savepoint keeps a failing source from breaking it.
+            isolation = transaction.atomic() if connection.in_atomic_block else nullcontext()
+            try:
+                raw, stats.timings["fetch"] = future.result()
+                with isolation:
+                    SYNC_SOURCES[source][1](raw, incremental, batch_size, bulk_validation, upsert, stats)
+            except Exception as exc:
+                logger.exception("Could not sync statements.", extra={"source": source})
+                stats.error = exc
+                continue
+
+            logger.info("Synced statements.", extra={"source": source, **stats.as_dict()})
+    return results
@@ -0,0 +1,142 @@
+"""
+Distinct values of statement fields used as admin list filters.
+
+Django's default list filter for a plain field runs a `SELECT DISTINCT` over the whole
+table on every changelist render. Here, the values are recorded in `StatementFacet`
+when statements are persisted and cached, so rendering the filters costs a cache read.
+Values no statement has anymore are pruned when statements are updated, or all at once
+by `rebuild_facets`.
+"""
+from functools import partial
+from typing import Dict, Iterable, List
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.db import models, transaction
+
+from nubank_django.models import AccountStatement, CardStatement, StatementFacet
+
+
+FACETED_MODELS = (CardStatement, AccountStatement)
+
+
+def _cache_key(model: models.Model, field_name: str) -> str:
+    return f"nubank_django:facets:{model._meta.model_name}:{field_name}"
+
+
+def _null_cache_key(model: models.Model, field_name: str) -> str:
+    return f"{_cache_key(model, field_name)}:null"
+
+
+def get_facet_values(model: models.Model, field_name: str) -> List[str]:
+    key = _cache_key(model, field_name)
+    values = cache.get(key)
+    if values is None:
+        values = list(
+            StatementFacet.objects.filter(model_name=model._meta.model_name, field_name=field_name)
+            .order_by("value")
+            .values_list("value", flat=True)
+        )
+        # Invalidated whenever a value is added or pruned, see record_facet_values.
+        cache.set(key, values, None)
+    return values
+
+
+def has_null_values(model: models.Model, field_name: str) -> bool:
+    key = _null_cache_key(model, field_name)
+    has_null = cache.get(key)
+    if has_null is None:
+        has_null = model.objects.filter(**{f"{field_name}__isnull": True}).exists()
+        cache.set(key, has_null, None)
+    return has_null
+
+
+def _invalidate_on_commit(*keys: str) -> None:
+    # Deleted before the commit, a changelist rendered meanwhile would cache the previous
+    # values again, with no timeout.
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _prune_facet_values(model: models.Model, field_name: str, values: set) -> None:
+    """Removes the values no statement has anymore. Facet fields are indexed, each check is a quick lookup."""
+    unused = {value for value in values if not model.objects.filter(**{field_name: value}).exists()}
+    if None in unused:
+        _invalidate_on_commit(_null_cache_key(model, field_name))
+    unused -= {None, ""}
+    if not unused:
+        return
+
+    StatementFacet.objects.filter(model_name=model._meta.model_name, field_name=field_name, value__in=unused).delete()
+    _invalidate_on_commit(_cache_key(model, field_name))
+
+
+def record_facet_values(
+    model: models.Model, statements: Iterable[models.Model], removed: Iterable[models.Model] = ()
+) -> None:
+    """
+    Records the statements' values missing from the model's facets, and prunes the
+    values of `removed` statements (e.g. the previous version of updated ones) left
+    without any statement.
+
+    Cached values are only invalidated once the caller's transaction commits.
+    """
+    statements, removed = list(statements), list(removed)
+    for field_name in model.FACET_FIELDS:
+        values = {getattr(statement, field_name) for statement in statements}
+        if None in values:
+            # Bound now: the loop moves on to other fields before the callback runs.
+            transaction.on_commit(partial(cache.set, _null_cache_key(model, field_name), True, None))
+
+        missing = values - set(get_facet_values(model, field_name)) - {None, ""}
+        if missing:
+            StatementFacet.objects.bulk_create(
+                [
+                    StatementFacet(model_name=model._meta.model_name, field_name=field_name, value=value)
+                    for value in missing
+                ],
+                ignore_conflicts=True,
+            )
+            _invalidate_on_commit(_cache_key(model, field_name))
+
+        gone = {getattr(statement, field_name) for statement in removed} - values
+        if gone:
+            _prune_facet_values(model, field_name, gone)
+
+
+def _distinct_values(model: models.Model, field_name: str) -> Iterable[str]:
+    return (
+        model.objects.exclude(**{f"{field_name}__isnull": True})
+        .exclude(**{field_name: ""})
+        .order_by()
+        .values_list(field_name, flat=True)
+        .distinct()
+    )
+
+
+def rebuild_facets() -> Dict[str, int]:
+    """Recomputes all facets from the statements, returning how many values each model has."""
+    counts = {}
+    with transaction.atomic():
+        StatementFacet.objects.all().delete()
+        for model in FACETED_MODELS:
+            facets = [
+                StatementFacet(model_name=model._meta.model_name, field_name=field_name, value=value)
+                for field_name in model.FACET_FIELDS
+                for value in _distinct_values(model, field_name)
+            ]
+            StatementFacet.objects.bulk_create(facets, batch_size=1000)
+            counts[model._meta.verbose_name_plural] = len(facets)
+            for field_name in model.FACET_FIELDS:
+                _invalidate_on_commit(_cache_key(model, field_name), _null_cache_key(model, field_name))
+    return counts
+
+
+class FacetListFilter(admin.AllValuesFieldListFilter):
+    """AllValuesFieldListFilter taking its choices from the facets instead of the whole table."""
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        # Replaces the lazy DISTINCT queryset set up by the parent, before it's ever evaluated.
+        self.lookup_choices = get_facet_values(model, field.name)
+        if field.null and has_null_values(model, field.name):
+            self.lookup_choices = [*self.lookup_choices, None]
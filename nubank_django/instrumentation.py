@@ -0,0 +1,184 @@
+"""
+Metrics of the import pipeline: duration, DB queries and rows of every stage, plus
+counters such as rejects by reason and cache hits.
+
+Stages are measured with `stage`, usable as a context manager or a decorator:
+
+    with stage("dedup", source="cardstatement") as metrics:
+        ...
+        metrics.rows = len(statements)
+
+Every measurement goes to the sinks in the NUBANK_METRICS_SINKS setting (dotted paths),
+by default `LoggingSink` and `PrometheusSink`. The latter aggregates everything in
+memory for `metrics_view`, which serves it in Prometheus' text format.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import ContextDecorator
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection
+from django.dispatch import Signal, receiver
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SINKS = [
+    "nubank_django.instrumentation.LoggingSink",
+    "nubank_django.instrumentation.PrometheusSink",
+]
+
+# Sent by SignalSink, with `metrics` (a StageMetrics) or `name`, `value` and `tags`.
+stage_finished = Signal()
+counter_incremented = Signal()
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    tags: Dict[str, str] = field(default_factory=dict)
+    duration: float = 0.0
+    queries: int = 0
+    rows: Optional[int] = None
+    failed: bool = False
+
+
+class MetricsSink:
+    def stage_finished(self, metrics: StageMetrics) -> None:
+        pass
+
+    def counter_incremented(self, name: str, value: int, tags: Dict[str, str]) -> None:
+        pass
+
+
+class LoggingSink(MetricsSink):
+    def stage_finished(self, metrics: StageMetrics) -> None:
+        logger.debug(
+            "Finished stage.",
+            extra={
+                "stage": metrics.name,
+                **metrics.tags,
+                "duration": metrics.duration,
+                "queries": metrics.queries,
+                "rows": metrics.rows,
+                "failed": metrics.failed,
+            },
+        )
+
+    def counter_incremented(self, name: str, value: int, tags: Dict[str, str]) -> None:
+        logger.debug("Incremented counter.", extra={"counter": name, "value": value, **tags})
+
+
+class SignalSink(MetricsSink):
+    def stage_finished(self, metrics: StageMetrics) -> None:
+        stage_finished.send(sender=self.__class__, metrics=metrics)
+
+    def counter_incremented(self, name: str, value: int, tags: Dict[str, str]) -> None:
+        counter_incremented.send(sender=self.__class__, name=name, value=value, tags=tags)
+
+
+_Labels = Tuple[Tuple[str, str], ...]
+_registry: Dict[str, Dict[_Labels, float]] = defaultdict(lambda: defaultdict(float))
+_registry_lock = threading.Lock()
+
+
+class PrometheusSink(MetricsSink):
+    """Aggregates metrics in memory, per process, for `metrics_view`."""
+
+    def _add(self, metric: str, labels: _Labels, value: float) -> None:
+        with _registry_lock:
+            _registry[metric][labels] += value
+
+    def stage_finished(self, metrics: StageMetrics) -> None:
+        labels = tuple(sorted({"stage": metrics.name, **metrics.tags}.items()))
+        self._add("nubank_stage_calls_total", labels, 1)
+        self._add("nubank_stage_seconds_total", labels, metrics.duration)
+        self._add("nubank_stage_queries_total", labels, metrics.queries)
+        if metrics.rows is not None:
+            self._add("nubank_stage_rows_total", labels, metrics.rows)
+        if metrics.failed:
+            self._add("nubank_stage_failures_total", labels, 1)
+
+    def counter_incremented(self, name: str, value: int, tags: Dict[str, str]) -> None:
+        self._add(f"nubank_{name}_total", tuple(sorted(tags.items())), value)
+
+
+def _format_labels(labels: _Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+def render_prometheus() -> str:
+    lines = []
+    with _registry_lock:
+        for metric in sorted(_registry):
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in sorted(_registry[metric].items()):
+                lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    with _registry_lock:
+        _registry.clear()
+
+
+def metrics_view(request) -> HttpResponse:
+    """Metrics aggregated by PrometheusSink, in Prometheus' text format. Add it to your urls to scrape it."""
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@lru_cache(maxsize=None)
+def get_sinks() -> List[MetricsSink]:
+    return [import_string(path)() for path in getattr(settings, "NUBANK_METRICS_SINKS", DEFAULT_SINKS)]
+
+
+@receiver(setting_changed)
+def _reset_sinks(setting: str, **kwargs) -> None:
+    if setting == "NUBANK_METRICS_SINKS":
+        get_sinks.cache_clear()
+
+
+def increment(name: str, value: int = 1, **tags: str) -> None:
+    for sink in get_sinks():
+        sink.counter_incremented(name, value, tags)
+
+
+class stage(ContextDecorator):
+    """Measures a pipeline stage: its duration, DB queries (on the current thread) and, when set, rows."""
+
+    def __init__(self, name: str, **tags: str):
+        self.name = name
+        self.tags = tags
+
+    def _recreate_cm(self) -> "stage":
+        # A fresh instance per decorated call, so calls can nest and run concurrently.
+        return self.__class__(self.name, **self.tags)
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.metrics.queries += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self) -> StageMetrics:
+        self.metrics = StageMetrics(self.name, dict(self.tags))
+        self._wrapper = connection.execute_wrapper(self._count_query)
+        self._wrapper.__enter__()
+        self._start = time.perf_counter()
+        return self.metrics
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.metrics.duration = time.perf_counter() - self._start
+        self._wrapper.__exit__(exc_type, exc, traceback)
+        self.metrics.failed = exc_type is not None
+        for sink in get_sinks():
+            sink.stage_finished(self.metrics)
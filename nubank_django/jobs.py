@@ -0,0 +1,134 @@
+"""
+Background execution of imports, without any external broker.
+
+Jobs are stored as `ImportJob` rows and run on a thread pool of the current process.
+With the NUBANK_IMPORT_JOBS_EAGER setting they run right away, on the calling thread.
+"""
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from nubank_django.checkpoints import get_checkpoint
+from nubank_django.domain import LoadStats, full_load_card_statements, full_load_nuconta_statements
+from nubank_django.models import ImportJob, SyncCheckpoint
+
+
+logger = logging.getLogger(__name__)
+# Jobs running without any progress for longer than this, or queued for longer than this,
+# are assumed to have died with their process.
+NUBANK_IMPORT_JOB_TIMEOUT = 60 * 15
+
+LOADERS = {
+    SyncCheckpoint.CARD_STATEMENTS: full_load_card_statements,
+    SyncCheckpoint.ACCOUNT_STATEMENTS: full_load_nuconta_statements,
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+class ImportAlreadyRunning(Exception):
+    pass
+
+
+class JobStats(LoadStats):
+    """LoadStats that writes the job's progress after every batch."""
+
+    def __init__(self, job: ImportJob):
+        super().__init__()
+        self.job = job
+
+    def batch_done(self) -> None:
+        ImportJob.objects.filter(pk=self.job.pk).update(
+            progress=self.considered, total=self.fetched, heartbeat_at=timezone.now()
+        )
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        workers = getattr(settings, "NUBANK_IMPORT_WORKERS", len(LOADERS))
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nubank-import")
+    return _executor
+
+
+def _fail_abandoned_jobs(source: str) -> None:
+    timeout = getattr(settings, "NUBANK_IMPORT_JOB_TIMEOUT", NUBANK_IMPORT_JOB_TIMEOUT)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    ImportJob.objects.filter(
+        Q(status=ImportJob.RUNNING, heartbeat_at__lt=cutoff)
+        # Started before heartbeats were recorded.
+        | Q(status=ImportJob.RUNNING, heartbeat_at__isnull=True, started_at__lt=cutoff)
+        | Q(status=ImportJob.QUEUED, created_at__lt=cutoff),
+        source=source,
+    ).update(status=ImportJob.FAILED, error="Abandoned: no progress for too long.", finished_at=timezone.now())
+
+
+def enqueue_import(source: str, **options) -> ImportJob:
+    """
+    Queues an import of `source`, with `options` passed to its loader.
+
+    Raises ImportAlreadyRunning when an import of the same source is queued or running.
+    """
+    _fail_abandoned_jobs(source)
+    already_running = ImportAlreadyRunning(f"An import of {source} is already queued or running.")
+    try:
+        with transaction.atomic():
+            # The source's checkpoint row serializes concurrent enqueues, so the check below is
+            # enough where the database skips the partial unique constraint (MySQL/MariaDB).
+            get_checkpoint(source)
+            SyncCheckpoint.objects.select_for_update().get(source=source)
+            if ImportJob.objects.filter(source=source, status__in=ImportJob.ACTIVE_STATUSES).exists():
+                raise already_running
+            job = ImportJob.objects.create(source=source, options=options)
+    except IntegrityError:
+        raise already_running
+
+    if getattr(settings, "NUBANK_IMPORT_JOBS_EAGER", False):
+        run_import_job(job.pk)
+        job.refresh_from_db()
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job.pk))
+    return job
+
+
+def _run_in_thread(job_id: int) -> None:  # pragma: nocover
+    try:
+        run_import_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def run_import_job(job_id: int) -> None:
+    job = ImportJob.objects.get(pk=job_id)
+    job.status = ImportJob.RUNNING
+    job.started_at = job.heartbeat_at = timezone.now()
+    job.save(update_fields=["status", "started_at", "heartbeat_at"])
+
+    stats = JobStats(job)
+    try:
+        LOADERS[job.source](**job.options, stats=stats)
+    except Exception:
+        logger.exception("Import job failed.", extra={"job_id": job.pk, "source": job.source})
+        job.status = ImportJob.FAILED
+        job.error = traceback.format_exc()
+        job.progress = stats.considered
+    else:
+        job.status = ImportJob.SUCCEEDED
+        # Records left out by an incremental load are never considered, but they're done as well.
+        job.progress = stats.fetched
+
+    job.total = stats.fetched
+    job.stats = stats.as_dict()
+    job.finished_at = timezone.now()
+    job.save()
+
+
+def get_latest_job(source: str) -> Optional[ImportJob]:
+    return ImportJob.objects.filter(source=source).first()
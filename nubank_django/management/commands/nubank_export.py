@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from nubank_django.domain import SYNC_SOURCES
+from nubank_django.management.commands.nubank_sync import SOURCE_NAMES
+from nubank_django.ndjson import write_feed
+
+
+class Command(BaseCommand):
+    help = "Exports a raw Nubank feed to an NDJSON file, to be replayed later with `nubank_sync --input`."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", choices=list(SOURCE_NAMES), required=True, help="Which feed to export.")
+        parser.add_argument(
+            "--output",
+            required=True,
+            help="File to write, gzip-compressed when it ends in .gz (e.g. card.ndjson.gz).",
+        )
+        parser.add_argument(
+            "--cache-policy",
+            default=None,
+            help="Cache policy used to get the feed (default: the NUBANK_CACHE_POLICY setting).",
+        )
+
+    def handle(self, *args, **options):
+        get_raw, _ = SYNC_SOURCES[SOURCE_NAMES[options["source"]]]
+        written = write_feed(options["output"], get_raw(cache_policy=options["cache_policy"]))
+        self.stdout.write(self.style.SUCCESS(f"Exported {written} records to {options['output']}."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from nubank_django.facets import rebuild_facets
+from nubank_django.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Recomputes the monthly summaries and the list filter facets from all stored statements."
+
+    def handle(self, *args, **options):
+        for name, count in rebuild_summaries().items():
+            self.stdout.write(self.style.SUCCESS(name) + f": {count} rows")
+        for name, count in rebuild_facets().items():
+            self.stdout.write(self.style.SUCCESS(f"{name} facets") + f": {count} values")
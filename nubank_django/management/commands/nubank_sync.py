@@ -0,0 +1,126 @@
+import json
+from typing import Dict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from nubank_django.domain import DEFAULT_BATCH_SIZE, SYNC_SOURCES, LoadStats, full_sync
+from nubank_django.models import SyncCheckpoint
+from nubank_django.ndjson import is_ndjson_path, iter_feed
+
+
+SOURCE_NAMES = {
+    "card": SyncCheckpoint.CARD_STATEMENTS,
+    "nuconta": SyncCheckpoint.ACCOUNT_STATEMENTS,
+}
+# Records handled by each stage, to report its throughput.
+STAGE_RECORDS = {
+    "fetch": lambda stats: stats.fetched,
+    "parse": lambda stats: stats.considered,
+    "persist": lambda stats: stats.parsed,
+}
+
+
+class Command(BaseCommand):
+    help = "Syncs Nubank statements into the database and reports throughput of each stage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            choices=[*SOURCE_NAMES, "all"],
+            default="all",
+            help="Which statements to sync (default: all).",
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only handle statements newer than the last sync.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Statements persisted per batch (default: {DEFAULT_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--bulk-validation",
+            action="store_true",
+            help="Validate statements against field metadata instead of running Django's field validation.",
+        )
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Also update stored statements that changed upstream (e.g. pending to settled).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Run the whole sync, then roll back every database change.",
+        )
+        parser.add_argument(
+            "--input",
+            help=(
+                "Read statements from a JSON or NDJSON (.ndjson, .ndjson.gz) file exported earlier"
+                " instead of the Nubank API (requires --source)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        sources = list(SYNC_SOURCES) if options["source"] == "all" else [SOURCE_NAMES[options["source"]]]
+        if options["input"] and len(sources) > 1:
+            raise CommandError("--input requires a single --source.")
+
+        if options["dry_run"]:
+            with transaction.atomic():
+                results = self._sync(sources, options)
+                transaction.set_rollback(True)
+            self.stdout.write(self.style.WARNING("Dry run: no changes were saved."))
+        else:
+            results = self._sync(sources, options)
+
+        self._report(results)
+        failed = [source for source, stats in results.items() if stats.error]
+        if failed:
+            raise CommandError(f"Could not sync: {', '.join(failed)}.")
+
+    def _sync(self, sources, options) -> Dict[str, LoadStats]:
+        load_options = dict(
+            incremental=options["incremental"],
+            batch_size=options["batch_size"],
+            bulk_validation=options["bulk_validation"],
+            upsert=options["upsert"],
+        )
+        if not options["input"]:
+            return full_sync(sources, **load_options)
+
+        [source] = sources
+        stats = LoadStats()
+        if is_ndjson_path(options["input"]):
+            # Streamed: reading is accounted for in the parse stage.
+            raw = iter_feed(options["input"])
+        else:
+            with stats.timer("fetch"):
+                with open(options["input"]) as input_file:
+                    raw = json.load(input_file)
+
+        _, load = SYNC_SOURCES[source]
+        # The checkpoint's committed span belongs to the API feed, it means nothing in an archive.
+        load(raw, stats=stats, resume=False, **load_options)
+        return {source: stats}
+
+    def _report(self, results: Dict[str, LoadStats]) -> None:
+        for source, stats in results.items():
+            if stats.error:
+                self.stdout.write(self.style.ERROR(f"{source}: failed with {stats.error!r}"))
+                continue
+
+            self.stdout.write(
+                self.style.SUCCESS(source)
+                + f": fetched {stats.fetched}, parsed {stats.parsed}, rejected {stats.rejected},"
+                + f" inserted {stats.inserted}, updated {stats.updated}, skipped {stats.skipped}"
+                + (f", {stats.rows_per_second:,.0f} rows/s" if stats.rows_per_second else "")
+            )
+            for stage, seconds in stats.timings.items():
+                records = STAGE_RECORDS[stage](stats)
+                rate = f"{records / seconds:,.0f} rows/s" if seconds else "-"
+                self.stdout.write(f"  {stage:<8} {seconds:8.3f}s  {rate}")
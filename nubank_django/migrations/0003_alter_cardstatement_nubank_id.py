@@ -0,0 +1,30 @@
+# Generated by Django 4.0.1 on 2022-03-05 14:20
+
+from django.db import migrations, models
+
+
+def remove_duplicated_card_statements(apps, schema_editor):
+    CardStatement = apps.get_model("nubank_django", "CardStatement")
+    duplicated_ids = (
+        CardStatement.objects.values("nubank_id")
+        .annotate(count=models.Count("id"), first_id=models.Min("id"))
+        .filter(count__gt=1)
+    )
+    for duplicated in duplicated_ids:
+        CardStatement.objects.filter(nubank_id=duplicated["nubank_id"]).exclude(id=duplicated["first_id"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubank_django', '0002_alter_accountstatement_gql_typename'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicated_card_statements, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='cardstatement',
+            name='nubank_id',
+            field=models.UUIDField(unique=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.10 on 2026-10-18 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubank_django', '0003_alter_cardstatement_nubank_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('card_statements', 'Card statements'), ('account_statements', 'NuConta statements')], max_length=32, unique=True)),
+                ('high_water_mark', models.DateTimeField(blank=True, null=True)),
+                ('boundary_ids', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.0.10 on 2026-10-18 10:52
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+# Frozen copies of the models' FINGERPRINT_FIELDS at the time of this migration.
+FINGERPRINT_FIELDS = {
+    "CardStatement": (
+        "account",
+        "amount",
+        "amount_without_iof",
+        "category",
+        "description",
+        "details",
+        "source",
+        "time",
+        "title",
+        "tokenized",
+    ),
+    "AccountStatement": (
+        "destination_account",
+        "origin_account",
+        "amount",
+        "detail",
+        "post_date",
+        "title",
+        "gql_typename",
+    ),
+}
+
+
+def compute_fingerprint(values):
+    """Frozen copy of `nubank_django.models.compute_fingerprint` at the time of this migration."""
+    encoded = json.dumps(list(values), sort_keys=True, default=str, separators=(",", ":")).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def fill_fingerprints(apps, schema_editor):
+    for model_name, field_names in FINGERPRINT_FIELDS.items():
+        model = apps.get_model("nubank_django", model_name)
+        batch = []
+        for statement in model.objects.only(*field_names).iterator(chunk_size=2000):
+            statement.fingerprint = compute_fingerprint(getattr(statement, name) for name in field_names)
+            batch.append(statement)
+            if len(batch) == 2000:
+                model.objects.bulk_update(batch, ["fingerprint"])
+                batch = []
+        model.objects.bulk_update(batch, ["fingerprint"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubank_django', '0005_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountstatement',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='cardstatement',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.RunPython(fill_fingerprints, migrations.RunPython.noop),
+    ]
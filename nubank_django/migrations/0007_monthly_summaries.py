@@ -0,0 +1,52 @@
+# Generated by Django 4.0.10 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubank_django', '0006_statement_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('gql_typename', models.CharField(choices=[('TransferOutEvent', 'TransferOutEvent'), ('BillPaymentEvent', 'BillPaymentEvent'), ('BarcodePaymentEvent', 'BarcodePaymentEvent'), ('PixTransferOutEvent', 'PixTransferOutEvent'), ('TransferOutReversalEvent', 'TransferOutReversalEvent'), ('TransferInEvent', 'TransferInEvent'), ('RemoveFromReserveEvent', 'RemoveFromReserveEvent'), ('AddToReserveEvent', 'AddToReserveEvent'), ('DebitPurchaseEvent', 'DebitPurchaseEvent'), ('DebitWithdrawalFeeEvent', 'DebitWithdrawalFeeEvent'), ('DebitWithdrawalEvent', 'DebitWithdrawalEvent')], max_length=64, verbose_name='Statement Type')),
+                ('counterparty', models.CharField(blank=True, max_length=256)),
+                ('inflow', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outflow', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'account monthly summaries',
+                'ordering': ('-month', 'gql_typename', 'counterparty'),
+            },
+        ),
+        migrations.CreateModel(
+            name='CardMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('title', models.CharField(max_length=128)),
+                ('category', models.CharField(max_length=128)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'card monthly summaries',
+                'ordering': ('-month', 'title', 'category'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cardmonthlysummary',
+            constraint=models.UniqueConstraint(fields=('month', 'title', 'category'), name='unique_card_monthly_summary'),
+        ),
+        migrations.AddConstraint(
+            model_name='accountmonthlysummary',
+            constraint=models.UniqueConstraint(fields=('month', 'gql_typename', 'counterparty'), name='unique_account_monthly_summary'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.0.10 on 2026-10-18 10:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubank_django', '0007_monthly_summaries'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accountstatement',
+            index=models.Index(fields=['gql_typename', 'post_date'], name='account_type_post_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accountstatement',
+            index=models.Index(fields=['post_date'], name='account_post_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cardstatement',
+            index=models.Index(fields=['title', 'time'], name='card_title_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cardstatement',
+            index=models.Index(fields=['source', 'time'], name='card_source_time_idx'),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 4.0.10 on 2026-10-18 11:02
+
+import logging
+import unicodedata
+
+from django.db import DatabaseError, migrations, models, transaction
+
+
+logger = logging.getLogger(__name__)
+
+# Frozen copies of the models' SEARCH_FIELDS at the time of this migration.
+SEARCH_FIELDS = {
+    "CardStatement": ("description", "title"),
+    "AccountStatement": ("title", "detail", "origin_account", "destination_account"),
+}
+TRIGRAM_INDEXES = {
+    "CardStatement": "card_search_text_trgm_idx",
+    "AccountStatement": "account_search_text_trgm_idx",
+}
+
+
+def normalize_search_text(*values):
+    """Frozen copy of `nubank_django.utils.normalize_search_text` at the time of this migration."""
+    text = " ".join(value for value in values if value)
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def fill_search_text(apps, schema_editor):
+    for model_name, field_names in SEARCH_FIELDS.items():
+        model = apps.get_model("nubank_django", model_name)
+        batch = []
+        for statement in model.objects.only(*field_names).iterator(chunk_size=2000):
+            statement.search_text = normalize_search_text(*(getattr(statement, name) for name in field_names))
+            batch.append(statement)
+            if len(batch) == 2000:
+                model.objects.bulk_update(batch, ["search_text"])
+                batch = []
+        model.objects.bulk_update(batch, ["search_text"])
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """On PostgreSQL, lets `search_text LIKE '%term%'` use an index. Skipped when pg_trgm can't be enabled."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError:
+        logger.warning("Could not enable pg_trgm, statement searches will not be indexed.")
+        return
+
+    for model_name, index_name in TRIGRAM_INDEXES.items():
+        table = apps.get_model("nubank_django", model_name)._meta.db_table
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin (search_text gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for index_name in TRIGRAM_INDEXES.values():
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubank_django', '0008_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountstatement',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='cardstatement',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='accountstatement',
+            index=models.Index(fields=['amount'], name='account_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cardstatement',
+            index=models.Index(fields=['amount'], name='card_amount_idx'),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.0.10 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+# Frozen copy of CardStatement.FACET_FIELDS at the time of this migration.
+FACET_FIELDS = {"CardStatement": ("title", "source")}
+
+
+def fill_facets(apps, schema_editor):
+    StatementFacet = apps.get_model("nubank_django", "StatementFacet")
+    for model_name, field_names in FACET_FIELDS.items():
+        model = apps.get_model("nubank_django", model_name)
+        for field_name in field_names:
+            values = model.objects.exclude(**{field_name: None}).values_list(field_name, flat=True).distinct()
+            StatementFacet.objects.bulk_create(
+                StatementFacet(model_name=model._meta.model_name, field_name=field_name, value=value)
+                for value in values.order_by()
+                if value
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubank_django', '0009_statement_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatementFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=64)),
+                ('field_name', models.CharField(max_length=64)),
+                ('value', models.CharField(max_length=256)),
+            ],
+            options={
+                'ordering': ('model_name', 'field_name', 'value'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='statementfacet',
+            constraint=models.UniqueConstraint(fields=('model_name', 'field_name', 'value'), name='unique_statement_facet'),
+        ),
+        migrations.RunPython(fill_facets, migrations.RunPython.noop),
+    ]
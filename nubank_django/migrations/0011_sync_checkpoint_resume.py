@@ -0,0 +1,33 @@
+# Generated by Django 4.0.10 on 2026-10-18 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubank_django', '0010_statement_facets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synccheckpoint',
+            name='committed_from',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='synccheckpoint',
+            name='committed_from_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='synccheckpoint',
+            name='committed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='synccheckpoint',
+            name='committed_until_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.0.10 on 2026-10-18 11:35
+
+from django.db import migrations, models
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce
+
+
+def fill_counterparty(apps, schema_editor):
+    """A single UPDATE, mirroring AccountStatement.account_name at the time of this migration."""
+    AccountStatement = apps.get_model("nubank_django", "AccountStatement")
+    account_name = Case(
+        When(gql_typename__contains="TransferOutEvent", then=F("destination_account")),
+        When(gql_typename="TransferInEvent", then=F("origin_account")),
+        default=Value(""),
+    )
+    AccountStatement.objects.update(counterparty=Coalesce(account_name, Value("")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubank_django', '0011_sync_checkpoint_resume'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountstatement',
+            name='counterparty',
+            field=models.CharField(blank=True, default='', max_length=256),
+        ),
+        # Filled before the index is built, so it isn't updated row by row.
+        migrations.RunPython(fill_counterparty, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='accountstatement',
+            index=models.Index(fields=['counterparty', 'post_date'], name='account_counterparty_date_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.0.10 on 2026-10-18 12:08
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+
+ZERO = Decimal("0.00")
+# Frozen copy of INFLOW_STATEMENT_TYPES at the time of this migration.
+INFLOW_STATEMENT_TYPES = ("TransferInEvent", "TransferOutReversalEvent", "RemoveFromReserveEvent")
+
+
+def fill_summaries(apps, schema_editor):
+    """Summaries created by 0007 start empty, imports would only add to them what they persist from then on."""
+    CardStatement = apps.get_model("nubank_django", "CardStatement")
+    CardMonthlySummary = apps.get_model("nubank_django", "CardMonthlySummary")
+    AccountStatement = apps.get_model("nubank_django", "AccountStatement")
+    AccountMonthlySummary = apps.get_model("nubank_django", "AccountMonthlySummary")
+
+    card_rows = (
+        CardStatement.objects.annotate(month=TruncMonth("time", output_field=models.DateField()))
+        .values("month", "title", "category")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+    CardMonthlySummary.objects.all().delete()
+    CardMonthlySummary.objects.bulk_create((CardMonthlySummary(**row) for row in card_rows.iterator()), batch_size=1000)
+
+    inflow = Q(gql_typename__in=INFLOW_STATEMENT_TYPES)
+    account_rows = (
+        AccountStatement.objects.annotate(month=TruncMonth("post_date"))
+        .values("month", "gql_typename", "counterparty")
+        .annotate(
+            inflow=Coalesce(Sum("amount", filter=inflow), ZERO),
+            outflow=Coalesce(Sum("amount", filter=~inflow), ZERO),
+            count=Count("id"),
+        )
+        .order_by()
+    )
+    AccountMonthlySummary.objects.all().delete()
+    AccountMonthlySummary.objects.bulk_create(
+        (AccountMonthlySummary(**row) for row in account_rows.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nubank_django', '0013_importjob_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,60 @@
-from typing import Optional
+import hashlib
+import json
+from typing import Iterable, Optional, Tuple
 
 from django.db import models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
 from django.forms import ValidationError
 
+from nubank_django.utils import normalize_search_text
 
-class CardStatement(models.Model):
+
+def compute_fingerprint(values: Iterable) -> str:
+    """Stable hash of a statement's values, used to detect statements changed upstream."""
+    encoded = json.dumps(list(values), sort_keys=True, default=str, separators=(",", ":")).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class StatementQuerySet(models.QuerySet):
+    def for_listing(self) -> "StatementQuerySet":
+        """Only the columns shown in listings, skipping heavy ones such as JSON details."""
+        return self.only(*self.model.LISTING_FIELDS)
+
+    def for_analytics(self) -> "StatementQuerySet":
+        """Only the columns needed to group and sum statements."""
+        return self.only(*self.model.ANALYTICS_FIELDS)
+
+
+class FingerprintedStatement(models.Model):
+    # Fields whose upstream changes are picked up by upserts.
+    FINGERPRINT_FIELDS: Tuple[str, ...] = ()
+    # Stored fields derived from FINGERPRINT_FIELDS, updated along with them.
+    DERIVED_FIELDS: Tuple[str, ...] = ()
+
+    fingerprint = models.CharField(max_length=32, blank=True, default="", editable=False)
+
+    class Meta:
+        abstract = True
+
+    def compute_fingerprint(self) -> str:
+        return compute_fingerprint(getattr(self, name) for name in self.FINGERPRINT_FIELDS)
+
+
+class SearchableStatement(models.Model):
+    # Text fields searchable through `search_text`, see `nubank_django.search`.
+    SEARCH_FIELDS: Tuple[str, ...] = ()
+
+    search_text = models.TextField(blank=True, default="", editable=False)
+
+    class Meta:
+        abstract = True
+
+    def compute_search_text(self) -> str:
+        return normalize_search_text(*(getattr(self, name) for name in self.SEARCH_FIELDS))
+
+
+class CardStatement(FingerprintedStatement, SearchableStatement):
     """
     Example of card statement object from pynubank:
 
@@ -24,7 +74,25 @@ class CardStatement(models.Model):
       'tokenized': True}
     """
 
-    nubank_id = models.UUIDField()
+    FINGERPRINT_FIELDS = (
+        "account",
+        "amount",
+        "amount_without_iof",
+        "category",
+        "description",
+        "details",
+        "source",
+        "time",
+        "title",
+        "tokenized",
+    )
+    SEARCH_FIELDS = ("description", "title")
+    # Fields whose distinct values are kept in StatementFacet, for the admin list filters.
+    FACET_FIELDS = ("title", "source")
+    LISTING_FIELDS = ("description", "title", "time", "amount")
+    ANALYTICS_FIELDS = ("time", "amount", "title", "category", "source")
+
+    nubank_id = models.UUIDField(unique=True)
 
     account = models.UUIDField(null=True, blank=True)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
@@ -37,6 +105,18 @@ class CardStatement(models.Model):
     title = models.CharField(max_length=128)
     tokenized = models.BooleanField(null=True, blank=True)
 
+    objects = StatementQuerySet.as_manager()
+
+    class Meta:
+        # Match the admin changelist: filtered by title or source, newest first. Scanned backwards,
+        # ascending indexes also give the changelist's "-pk" tiebreaker for free.
+        indexes = [
+            models.Index(fields=["title", "time"], name="card_title_time_idx"),
+            models.Index(fields=["source", "time"], name="card_source_time_idx"),
+            # Exact amount searches, see `nubank_django.search`.
+            models.Index(fields=["amount"], name="card_amount_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"({self.time.date().strftime('%d/%b/%Y')}) {self.description}: R$ {self.amount}"
 
@@ -48,9 +128,24 @@ DEBIT_STATEMENT_TYPES = (
     "PixTransferOutEvent",
 )
 CREDIT_STATEMENT_TYPES = ("TransferInEvent", "TransferOutReversalEvent")
+# Statements adding money to the account, everything else takes money out of it.
+INFLOW_STATEMENT_TYPES = (*CREDIT_STATEMENT_TYPES, "RemoveFromReserveEvent")
 
 
-class AccountStatement(models.Model):
+class AccountStatementQuerySet(StatementQuerySet):
+    def counterparty_monthly_totals(self, counterparty: str) -> models.QuerySet:
+        """Money received from and sent to `counterparty` per month, in a single query on its index."""
+        inflow = Q(gql_typename__in=INFLOW_STATEMENT_TYPES)
+        return (
+            self.filter(counterparty=counterparty)
+            .annotate(month=TruncMonth("post_date"))
+            .values("month")
+            .annotate(inflow=Sum("amount", filter=inflow), outflow=Sum("amount", filter=~inflow), count=Count("id"))
+            .order_by("month")
+        )
+
+
+class AccountStatement(FingerprintedStatement, SearchableStatement):
     ACCOUNT_STATEMENT_TYPE = (
         # DEBIT
         ("TransferOutEvent", "TransferOutEvent"),
@@ -68,16 +163,47 @@ class AccountStatement(models.Model):
         ("DebitWithdrawalFeeEvent", "DebitWithdrawalFeeEvent"),
         ("DebitWithdrawalEvent", "DebitWithdrawalEvent"),
     )
+    FINGERPRINT_FIELDS = (
+        "destination_account",
+        "origin_account",
+        "amount",
+        "detail",
+        "post_date",
+        "title",
+        "gql_typename",
+    )
+    DERIVED_FIELDS = ("counterparty",)
+    SEARCH_FIELDS = ("title", "detail", "origin_account", "destination_account")
+    # gql_typename's list filter already takes its values from the field's choices.
+    FACET_FIELDS = ()
+    LISTING_FIELDS = ("detail", "gql_typename", "post_date", "counterparty", "amount")
+    ANALYTICS_FIELDS = ("post_date", "amount", "gql_typename", "counterparty")
 
     nubank_id = models.UUIDField(unique=True)
     destination_account = models.CharField(max_length=256, null=True, blank=True)
     origin_account = models.CharField(max_length=256, null=True, blank=True)
+    # account_name, stored so it can be filtered and aggregated on. Blank for statements without one.
+    counterparty = models.CharField(max_length=256, blank=True, default="")
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     detail = models.TextField()
     post_date = models.DateField()
     title = models.CharField(max_length=128)
     gql_typename = models.CharField("Statement Type", choices=ACCOUNT_STATEMENT_TYPE, max_length=64)
 
+    objects = AccountStatementQuerySet.as_manager()
+
+    class Meta:
+        # Match the admin changelist: newest first, optionally filtered by type or a date range.
+        # Ascending, for the same reason as CardStatement's.
+        indexes = [
+            models.Index(fields=["gql_typename", "post_date"], name="account_type_post_date_idx"),
+            models.Index(fields=["post_date"], name="account_post_date_idx"),
+            # Exact amount searches, see `nubank_django.search`.
+            models.Index(fields=["amount"], name="account_amount_idx"),
+            # Statements of a counterparty, over time, see `AccountStatementQuerySet.counterparty_monthly_totals`.
+            models.Index(fields=["counterparty", "post_date"], name="account_counterparty_date_idx"),
+        ]
+
     def __str__(self):
         return f"({self.post_date}) {self.detail}: R$ {self.amount}"
 
@@ -105,3 +231,144 @@ class AccountStatement(models.Model):
 
         if self.is_transfer_out and not getattr(self, "destination_account", None):
             raise ValidationError("*TransferOutEvent must have an associated destination_account.")
+
+
+class SyncCheckpoint(models.Model):
+    """High-water mark of the newest statement already synced for a given source."""
+
+    CARD_STATEMENTS = "card_statements"
+    ACCOUNT_STATEMENTS = "account_statements"
+    SOURCES = (
+        (CARD_STATEMENTS, "Card statements"),
+        (ACCOUNT_STATEMENTS, "NuConta statements"),
+    )
+
+    source = models.CharField(choices=SOURCES, max_length=32, unique=True)
+    high_water_mark = models.DateTimeField(null=True, blank=True)
+    # Statements sharing the high-water mark, so they're not re-imported on the next run.
+    boundary_ids = models.JSONField(default=list, blank=True)
+    # Span of the feed (newest first) already committed by a load that didn't finish, and the
+    # ids at both ends, skipped when the load is run again. Cleared once a load completes.
+    committed_from = models.DateTimeField(null=True, blank=True)
+    committed_from_ids = models.JSONField(default=list, blank=True)
+    committed_until = models.DateTimeField(null=True, blank=True)
+    committed_until_ids = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.get_source_display()}: {self.high_water_mark}"
+
+
+class ImportJob(models.Model):
+    """An import running (or queued to run) in the background, see `nubank_django.jobs`."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    )
+    ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+    source = models.CharField(choices=SyncCheckpoint.SOURCES, max_length=32)
+    status = models.CharField(choices=STATUSES, default=QUEUED, max_length=16)
+    options = models.JSONField(default=dict, blank=True)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    stats = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Last time the job reported progress, a running job that stops updating it has died.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        constraints = [
+            # Overlapping imports of the same source are refused by the database itself, except on
+            # MySQL/MariaDB, which have no partial indexes; enqueue_import checks for them as well.
+            models.UniqueConstraint(
+                fields=["source"],
+                condition=models.Q(status__in=("queued", "running")),
+                name="unique_active_import_per_source",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_source_display()} import ({self.get_status_display()})"
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in self.ACTIVE_STATUSES
+
+    @property
+    def progress_display(self) -> str:
+        if self.total:
+            return f"{self.progress}/{self.total} ({self.progress * 100 // self.total}%)"
+        return str(self.progress)
+
+
+class CardMonthlySummary(models.Model):
+    """Card spending per month, title and category, kept up to date by every import."""
+
+    month = models.DateField()
+    title = models.CharField(max_length=128)
+    category = models.CharField(max_length=128)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ("-month", "title", "category")
+        verbose_name_plural = "card monthly summaries"
+        constraints = [
+            models.UniqueConstraint(fields=["month", "title", "category"], name="unique_card_monthly_summary"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.month:%b/%Y} {self.title} ({self.category}): R$ {self.total}"
+
+
+class AccountMonthlySummary(models.Model):
+    """NuConta inflow and outflow per month, statement type and counterparty, kept up to date by every import."""
+
+    month = models.DateField()
+    gql_typename = models.CharField("Statement Type", choices=AccountStatement.ACCOUNT_STATEMENT_TYPE, max_length=64)
+    # AccountStatement.counterparty, blank for statements without one.
+    counterparty = models.CharField(max_length=256, blank=True)
+    inflow = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outflow = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ("-month", "gql_typename", "counterparty")
+        verbose_name_plural = "account monthly summaries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["month", "gql_typename", "counterparty"], name="unique_account_monthly_summary"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.month:%b/%Y} {self.gql_typename} {self.counterparty}: +R$ {self.inflow} -R$ {self.outflow}"
+
+
+class StatementFacet(models.Model):
+    """A value present in a statement field, so list filters don't need a DISTINCT over the whole table."""
+
+    model_name = models.CharField(max_length=64)
+    field_name = models.CharField(max_length=64)
+    value = models.CharField(max_length=256)
+
+    class Meta:
+        ordering = ("model_name", "field_name", "value")
+        constraints = [
+            models.UniqueConstraint(fields=["model_name", "field_name", "value"], name="unique_statement_facet"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.model_name}.{self.field_name}: {self.value}"
@@ -0,0 +1,75 @@
+"""
+Export and import of raw feeds as NDJSON (one JSON record per line) files.
+
+Files are written and read one record at a time, so archives of any size can be
+replayed through `load_*_statements` with bounded memory. Files ending in ".gz"
+are gzip-compressed; large uncompressed files are read through a memory map.
+"""
+import gzip
+import json
+import mmap
+import os
+from typing import IO, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # pragma: nocover
+    orjson = None
+
+
+# Below this size, plain buffered reads are as fast as a memory map.
+MMAP_THRESHOLD = 16 * 1024 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+
+_loads = orjson.loads if orjson else json.loads
+
+
+def _dumps(record: dict) -> bytes:
+    if orjson:
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _is_gzip(path: str) -> bool:
+    with open(path, "rb") as feed_file:
+        return feed_file.read(2) == GZIP_MAGIC
+
+
+def write_feed(path: str, records: Iterable[dict]) -> int:
+    """Writes the records to `path`, gzip-compressed when it ends in ".gz". Returns how many were written."""
+    opener = gzip.open if path.endswith(".gz") else open
+    written = 0
+    with opener(path, "wb") as feed_file:
+        for record in records:
+            feed_file.write(_dumps(record))
+            feed_file.write(b"\n")
+            written += 1
+    return written
+
+
+def _iter_lines(feed_file: IO[bytes]) -> Iterator[dict]:
+    for line in feed_file:
+        if line.strip():
+            yield _loads(line)
+
+
+def iter_feed(path: str) -> Iterator[dict]:
+    """Yields the records of a file written by `write_feed`, one at a time."""
+    if _is_gzip(path):
+        with gzip.open(path, "rb") as feed_file:
+            yield from _iter_lines(feed_file)
+        return
+
+    if os.path.getsize(path) < MMAP_THRESHOLD:
+        with open(path, "rb") as feed_file:
+            yield from _iter_lines(feed_file)
+        return
+
+    with open(path, "rb") as feed_file, mmap.mmap(feed_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for line in iter(mapped.readline, b""):
+            if line.strip():
+                yield _loads(line)
+
+
+def is_ndjson_path(path: str) -> bool:
+    return path.endswith((".ndjson", ".ndjson.gz", ".jsonl", ".jsonl.gz"))
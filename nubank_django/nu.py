@@ -1,91 +1,223 @@
 import os
-import json
 import logging
-from typing import Tuple
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
+import requests
+from django.conf import settings
 from django.core.cache import cache
+from django.utils.dateparse import parse_datetime
 from pynubank import HttpClient, MockHttpClient, Nubank
-from pynubank.utils.parsing import parse_float, parse_pix_transaction
+from pynubank.auth_mode import AuthMode
+from pynubank.utils.parsing import PIX_TRANSACTION_MAP
+from requests_pkcs12 import Pkcs12Adapter
+
+from nubank_django.cache import get_feed_cache
 
 
 logger = logging.getLogger(__name__)
-NUBANK_CACHE_TTL = 60 * 60 * 2  # 2 hour
+NUBANK_SESSION_TTL = 60 * 30  # 30 minutes, for token responses without `refresh_before`
+NUBANK_SESSION_CACHE_KEY = "nubank_session"
+# Tokens are refreshed this long before they expire, so none expires mid-import.
+TOKEN_REFRESH_MARGIN = 60 * 5
+
+
+class PooledHttpClient(HttpClient):
+    """
+    HttpClient that keeps a single requests.Session around.
+
+    pynubank's HttpClient opens a new session, and loads the certificate again, on every
+    request; this one reuses the connection pool across requests.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._session = requests.Session()
+
+    def set_cert(self, cert_path: str):
+        super().set_cert(cert_path)
+        self._session.mount("https://", Pkcs12Adapter(pkcs12_filename=cert_path, pkcs12_password=""))
+
+    def raw_get(self, url: str) -> requests.Response:
+        return self._session.get(url, headers=self._headers)
+
+    def post(self, url: str, json: dict) -> dict:
+        return self._handle_response(self._session.post(url, json=json, headers=self._headers))
 
 
 def _get_http_client():
     """This method makes it easier for mocking during tests."""
-    # pragma: nocover
-    return HttpClient()
+    return PooledHttpClient()
+
+
+# Same pattern as pynubank's parse_float: "Fulano\nR$ 1.234,56" -> 1234.56
+BRL_AMOUNT_RE = re.compile(r"(?:\d*\.)*\d+,\d{1,2}")
+
+
+def parse_brl_amount(detail: str) -> float:
+    return float(BRL_AMOUNT_RE.search(detail).group().replace(".", "").replace(",", "."))
+
+
+def _normalize_generic_event(event: dict) -> Optional[dict]:
+    """PIX transfers come as GenericFeedEvents, told apart by their title. Other generic events are dropped."""
+    typename = PIX_TRANSACTION_MAP.get(event["title"])
+    if typename is None:
+        return None
+
+    event["__typename"] = typename
+    event["amount"] = parse_brl_amount(event["detail"])
+    return event
+
+
+def _normalize_reserve_event(event: dict) -> dict:
+    # Reserve events only have the amount in their detail: an amount means it's been normalized already.
+    if "amount" not in event:
+        event["amount"] = parse_brl_amount(event["detail"])
+    return event
+
 
+# Events of any other type are kept as they are.
+ACCOUNT_EVENT_NORMALIZERS: Dict[str, Callable[[dict], Optional[dict]]] = {
+    "GenericFeedEvent": _normalize_generic_event,
+    "AddToReserveEvent": _normalize_reserve_event,
+    "RemoveFromReserveEvent": _normalize_reserve_event,
+}
 
-def parse_reserve_events(transaction: dict) -> dict:
-    if not transaction["__typename"] in ("AddToReserveEvent", "RemoveFromReserveEvent"):
-        return transaction
 
-    transaction["amount"] = parse_float(transaction["detail"])
-    return transaction
+def normalize_account_feed(feed: Iterable[dict]) -> List[dict]:
+    """
+    Maps PIX transfers to their own types, fills in the amount of reserve events and
+    drops the remaining generic events, in a single pass updating events in place.
+
+    Normalizing a feed twice is harmless and cheap, events normalized already are
+    passed through.
+    """
+    normalized = []
+    for event in feed:
+        normalizer = ACCOUNT_EVENT_NORMALIZERS.get(event["__typename"])
+        if normalizer is not None:
+            event = normalizer(event)
+            if event is None:
+                continue
+        normalized.append(event)
+    return normalized
+
+
+CARD_STATEMENTS_CACHE_KEY = "card_statements"
+ACCOUNT_FEED_CACHE_KEY = "nuconta_feed"
 
 
 class NubankClient(Nubank):
-    def get_card_statements(self):
-        cache_policy = os.getenv("NUBANK_CACHE_POLICY", "push-pull")
-        CARD_STATEMENTS_CACHE_KEY = "card_statements.json"
+    auth_data: Optional[dict] = None
+    expires_at: Optional[float] = None
 
-        cached_card_statements = cache.get(CARD_STATEMENTS_CACHE_KEY)
+    def _save_auth_data(self, auth_data: dict) -> None:
+        super()._save_auth_data(auth_data)
+        self.auth_data = auth_data
 
-        if "pull" in cache_policy and cached_card_statements:
-            logger.info(f"Cache hit for '{CARD_STATEMENTS_CACHE_KEY}'.")
-            raw_card_statements = json.loads(cached_card_statements)
-            from_cache = True
+        refresh_before = parse_datetime(auth_data.get("refresh_before") or "")
+        if refresh_before:
+            self.expires_at = refresh_before.timestamp()
         else:
-            raw_card_statements = super().get_card_statements()
-            from_cache = False
+            self.expires_at = time.time() + getattr(settings, "NUBANK_SESSION_TTL", NUBANK_SESSION_TTL)
 
-        if "push" in cache_policy and not from_cache:
-            logger.info(f"Setting cache for '{CARD_STATEMENTS_CACHE_KEY}'.")
-            cache.set(
-                CARD_STATEMENTS_CACHE_KEY,
-                json.dumps(raw_card_statements),
-                NUBANK_CACHE_TTL,
-            )
+    def restore_session(self, auth_data: dict, expires_at: float, cert_path: str) -> None:
+        """Reuses tokens from a previous authentication instead of logging in again."""
+        self._client.set_cert(cert_path)
+        self._save_auth_data(auth_data)
+        self.expires_at = expires_at
+        self._auth_mode = AuthMode.APP
 
-        return raw_card_statements
+    @property
+    def needs_refresh(self) -> bool:
+        return self.expires_at is None or time.time() >= self.expires_at - TOKEN_REFRESH_MARGIN
 
-    def get_account_feed_with_pix_mapping(self):
-        cache_policy = os.getenv("NUBANK_CACHE_POLICY", "push-pull")
-        ACCOUNT_FEED_CACHE_KEY = "nuconta_feed.json"
+    def get_card_statements(self, cache_policy: Optional[str] = None):
+        return get_feed_cache().fetch(CARD_STATEMENTS_CACHE_KEY, super().get_card_statements, cache_policy)
 
-        cached_account_feed = cache.get(ACCOUNT_FEED_CACHE_KEY)
+    def get_normalized_account_feed(self) -> List[dict]:
+        return normalize_account_feed(self.get_account_feed())
 
-        if "pull" in cache_policy and cached_account_feed:
-            logger.info(f"Cache hit for '{ACCOUNT_FEED_CACHE_KEY}'.")
-            raw_account_feed = json.loads(cached_account_feed)
-            from_cache = True
-        else:
-            raw_account_feed = self.get_account_feed()
-            from_cache = False
+    def get_account_feed_with_pix_mapping(self, cache_policy: Optional[str] = None):
+        # The feed is cached normalized, so cached events aren't parsed again. Feeds cached raw
+        # by earlier versions are normalized here, a pass-through for normalized ones.
+        account_feed = get_feed_cache().fetch(ACCOUNT_FEED_CACHE_KEY, self.get_normalized_account_feed, cache_policy)
+        return normalize_account_feed(account_feed)
+
+
+class NubankSessionManager:
+    """
+    Keeps an authenticated client for the whole process, so imports don't pay for a
+    certificate login each time.
+
+    Tokens are refreshed (with the refresh token when there's one) shortly before they
+    expire. With the NUBANK_SESSION_CACHE setting, tokens are also shared through
+    Django's cache with other processes.
+    """
+
+    def __init__(self):
+        self._client: Optional[NubankClient] = None
+        self._lock = threading.Lock()
+
+    def get_client(self) -> NubankClient:
+        with self._lock:
+            if self._client is None or self._client.needs_refresh:
+                self._client = self._authenticate(self._client)
+            return self._client
+
+    def reset(self) -> None:
+        with self._lock:
+            self._client = None
+
+    @staticmethod
+    def _uses_shared_cache() -> bool:
+        return getattr(settings, "NUBANK_SESSION_CACHE", False)
+
+    def _authenticate(self, previous_client: Optional[NubankClient]) -> NubankClient:
+        # Reusing the http client keeps its connection pool.
+        http_client = previous_client._client if previous_client else _get_http_client()
+        nu = NubankClient(http_client)
+        cpf, password, cert_path = _get_login_arguments(http_client)
+
+        cached_session = cache.get(NUBANK_SESSION_CACHE_KEY) if self._uses_shared_cache() else None
+        if cached_session:
+            nu.restore_session(cached_session["auth_data"], cached_session["expires_at"], cert_path)
+            if not nu.needs_refresh:
+                logger.info("Reusing Nubank session from cache.")
+                return nu
+
+        refresh_token = ((previous_client or nu).auth_data or {}).get("refresh_token")
+        if refresh_token:
+            try:
+                nu.authenticate_with_refresh_token(refresh_token, cert_path)
+                logger.info("Refreshed Nubank session.")
+            except Exception:
+                logger.warning("Could not refresh Nubank session, logging in again.", exc_info=True)
+                refresh_token = None
+
+        if not refresh_token:
+            nu.authenticate_with_cert(cpf, password, cert_path)
+            logger.info("Authenticated new Nubank session.")
+
+        if self._uses_shared_cache():
+            timeout = max(int(nu.expires_at - time.time()), 1)
+            cache.set(NUBANK_SESSION_CACHE_KEY, {"auth_data": nu.auth_data, "expires_at": nu.expires_at}, timeout)
+        return nu
+
+
+session_manager = NubankSessionManager()
 
-        if "push" in cache_policy and not from_cache:
-            logger.info(f"Setting cache for '{ACCOUNT_FEED_CACHE_KEY}'.")
-            cache.set(ACCOUNT_FEED_CACHE_KEY, json.dumps(raw_account_feed), NUBANK_CACHE_TTL)
 
-        transactions_with_pix = map(parse_pix_transaction, raw_account_feed)
-        transactions_without_generic_feed_events = filter(
-            lambda t: t["__typename"] != "GenericFeedEvent", transactions_with_pix
-        )
-        transactions_with_reserve_events = map(parse_reserve_events, transactions_without_generic_feed_events)
-        return list(transactions_with_reserve_events)
+def get_authed_nu_client() -> NubankClient:
+    return session_manager.get_client()
 
 
-def get_authed_nu_client():
-    http_client = _get_http_client()
-    nu = NubankClient(http_client)
+def _get_login_arguments(http_client: HttpClient) -> Tuple[str, str, str]:
     if isinstance(http_client, MockHttpClient):
-        nu.authenticate_with_cert("fake-cpf", "fake-password", "fake-cert_path")
-    else:  # pragma: nocover
-        cpf, password, cert_path = _get_credentials()
-        nu.authenticate_with_cert(cpf, password, cert_path)
-    return nu
+        return "fake-cpf", "fake-password", "fake-cert_path"
+    return _get_credentials()  # pragma: nocover
 
 
 def _get_credentials() -> Tuple[str]:
@@ -0,0 +1,80 @@
+"""
+Statement searches that can use an index.
+
+Searches for a UUID are exact matches on the indexed `nubank_id`, and the start of one
+(8 hex digits or more) a range over it, which the index serves too. Anything else is
+matched against `search_text`, a normalized copy of the statement's text fields filled
+on persist, instead of an OR of `icontains` over every field (which casts `amount` and
+`nubank_id` to text and always scans the whole table). Terms that look like an amount
+also match the indexed `amount` exactly, so "99" finds both R$ 99,00 and "Ap. 99".
+"""
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Optional, Tuple
+from uuid import UUID
+
+from django.db.models import Q, QuerySet
+
+from nubank_django.utils import normalize_search_text
+
+
+# The start of a UUID, without its dashes. Shorter terms are too likely to be words or numbers.
+UUID_PREFIX_RE = re.compile(r"^[0-9a-f]{8,31}$")
+THOUSANDS_RE = re.compile(r"^-?\d{1,3}(?:\.\d{3})+$")
+# 32.90, 32,90, 1.234,56, R$ 10 and -5 all look like amounts.
+AMOUNT_RE = re.compile(r"^(?:R\$)?\s*(-?\d{1,3}(?:\.\d{3})*(?:,\d{1,2})?|-?\d+(?:[.,]\d{1,2})?)$", re.IGNORECASE)
+
+
+def parse_uuid(term: str) -> Optional[UUID]:
+    try:
+        return UUID(term)
+    except ValueError:
+        return None
+
+
+def parse_uuid_prefix(term: str) -> Optional[Tuple[UUID, UUID]]:
+    """The lowest and highest UUIDs starting with `term`, e.g. the first 8 digits of an id."""
+    digits = term.replace("-", "").lower()
+    if not UUID_PREFIX_RE.match(digits):
+        return None
+    padding = 32 - len(digits)
+    return UUID(digits + "0" * padding), UUID(digits + "f" * padding)
+
+
+def parse_amount(term: str) -> Optional[Decimal]:
+    """Parses amounts written either way, "1234.56" or "1.234,56". Dots followed by 3 digits separate thousands."""
+    match = AMOUNT_RE.match(term)
+    if not match:
+        return None
+
+    number = match.group(1)
+    if "," in number or THOUSANDS_RE.match(number):
+        number = number.replace(".", "").replace(",", ".")
+    try:
+        return Decimal(number)
+    except InvalidOperation:  # pragma: nocover
+        return None
+
+
+def search_statements(queryset: QuerySet, search_term: str) -> QuerySet:
+    term = search_term.strip()
+    if not term:
+        return queryset
+
+    nubank_id = parse_uuid(term)
+    if nubank_id is not None:
+        return queryset.filter(nubank_id=nubank_id)
+
+    # Like the admin's default search, every word has to match.
+    condition = Q()
+    for word in normalize_search_text(term).split():
+        condition &= Q(search_text__contains=word)
+
+    amount = parse_amount(term)
+    if amount is not None:
+        condition = Q(amount=amount) | condition
+
+    id_range = parse_uuid_prefix(term)
+    if id_range is not None:
+        condition = Q(nubank_id__range=id_range) | condition
+    return queryset.filter(condition)
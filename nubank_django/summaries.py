@@ -0,0 +1,161 @@
+"""
+Monthly summaries of statements, so dashboards read one row per month and group
+instead of aggregating the whole statement history.
+
+Imports keep them up to date through `apply_statement_changes`, which only looks at
+the statements the import created or updated. `rebuild_summaries` recomputes them
+from scratch, e.g. after statements are edited or deleted by other means.
+"""
+import datetime
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, NamedTuple, Tuple, Type
+
+from django.db import models, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from nubank_django.models import (
+    INFLOW_STATEMENT_TYPES,
+    AccountMonthlySummary,
+    AccountStatement,
+    CardMonthlySummary,
+    CardStatement,
+)
+
+
+logger = logging.getLogger(__name__)
+ZERO = Decimal("0.00")
+
+
+class Summary(NamedTuple):
+    model: Type[models.Model]
+    # Fields identifying a summary row, the first one being always "month".
+    key_fields: Tuple[str, ...]
+    amount_fields: Tuple[str, ...]
+    # Summary key and amounts a single statement adds to its row.
+    contribution: Callable[[models.Model], Tuple[tuple, tuple]]
+
+
+def _month(day: datetime.date) -> datetime.date:
+    return day.replace(day=1)
+
+
+def _card_contribution(statement: CardStatement) -> Tuple[tuple, tuple]:
+    # Same month boundaries as TruncMonth, which uses the current time zone.
+    month = _month(timezone.localtime(statement.time).date())
+    return (month, statement.title, statement.category), (statement.amount,)
+
+
+def _account_contribution(statement: AccountStatement) -> Tuple[tuple, tuple]:
+    key = (_month(statement.post_date), statement.gql_typename, statement.counterparty)
+    if statement.gql_typename in INFLOW_STATEMENT_TYPES:
+        return key, (statement.amount, ZERO)
+    return key, (ZERO, statement.amount)
+
+
+SUMMARIES: Dict[Type[models.Model], Summary] = {
+    CardStatement: Summary(CardMonthlySummary, ("month", "title", "category"), ("total",), _card_contribution),
+    AccountStatement: Summary(
+        AccountMonthlySummary, ("month", "gql_typename", "counterparty"), ("inflow", "outflow"), _account_contribution
+    ),
+}
+
+
+def _add_contributions(deltas: dict, summary: Summary, statements: Iterable[models.Model], sign: int) -> None:
+    for statement in statements:
+        key, amounts = summary.contribution(statement)
+        delta = deltas[key]
+        for index, amount in enumerate(amounts):
+            delta[index] += sign * amount
+        delta[-1] += sign
+
+
+def apply_statement_changes(
+    statement_model: Type[models.Model],
+    created: Iterable[models.Model] = (),
+    added: Iterable[models.Model] = (),
+    removed: Iterable[models.Model] = (),
+) -> None:
+    """
+    Adds `created` and `added` statements to their summary rows and takes `removed` ones
+    out, e.g. the previous version of updated statements.
+
+    Only summary rows of the affected months are read, locked for the update.
+    """
+    summary = SUMMARIES[statement_model]
+    deltas = defaultdict(lambda: [ZERO] * len(summary.amount_fields) + [0])
+    _add_contributions(deltas, summary, created, 1)
+    _add_contributions(deltas, summary, added, 1)
+    _add_contributions(deltas, summary, removed, -1)
+    if not deltas:
+        return
+
+    # Errors roll back the caller's transaction as well, no savepoint needed.
+    with transaction.atomic(savepoint=False):
+        months = {key[0] for key in deltas}
+        rows = summary.model.objects.select_for_update().filter(month__in=months)
+        rows_by_key = {tuple(getattr(row, name) for name in summary.key_fields): row for row in rows}
+
+        to_create, to_update, to_delete = [], [], []
+        for key, delta in deltas.items():
+            row = rows_by_key.get(key) or summary.model(**dict(zip(summary.key_fields, key)))
+            for name, amount in zip(summary.amount_fields, delta):
+                setattr(row, name, getattr(row, name) + amount)
+            row.count += delta[-1]
+
+            if row.pk is None:
+                to_create.append(row)
+            elif row.count:
+                to_update.append(row)
+            else:
+                to_delete.append(row.pk)
+
+        summary.model.objects.bulk_create(to_create)
+        summary.model.objects.bulk_update(to_update, [*summary.amount_fields, "count"])
+        if to_delete:
+            summary.model.objects.filter(pk__in=to_delete).delete()
+
+
+def _rebuild_card_summaries() -> int:
+    rows = (
+        CardStatement.objects.annotate(month=TruncMonth("time", output_field=models.DateField()))
+        .values("month", "title", "category")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+    summaries = [CardMonthlySummary(**row) for row in rows.iterator()]
+    CardMonthlySummary.objects.all().delete()
+    CardMonthlySummary.objects.bulk_create(summaries, batch_size=1000)
+    return len(summaries)
+
+
+def _rebuild_account_summaries() -> int:
+    inflow = Q(gql_typename__in=INFLOW_STATEMENT_TYPES)
+    rows = (
+        AccountStatement.objects.annotate(month=TruncMonth("post_date"))
+        .values("month", "gql_typename", "counterparty")
+        .annotate(
+            inflow=Coalesce(Sum("amount", filter=inflow), ZERO),
+            outflow=Coalesce(Sum("amount", filter=~inflow), ZERO),
+            count=Count("id"),
+        )
+        .order_by()
+    )
+    summaries = [AccountMonthlySummary(**row) for row in rows.iterator()]
+    AccountMonthlySummary.objects.all().delete()
+    AccountMonthlySummary.objects.bulk_create(summaries, batch_size=1000)
+    return len(summaries)
+
+
+def rebuild_summaries() -> Dict[str, int]:
+    """Recomputes all summaries from the statements, returning how many rows each one has."""
+    with transaction.atomic():
+        counts = {
+            CardMonthlySummary._meta.verbose_name_plural: _rebuild_card_summaries(),
+            AccountMonthlySummary._meta.verbose_name_plural: _rebuild_account_summaries(),
+        }
+    logger.info("Rebuilt monthly summaries.", extra=counts)
+    return counts
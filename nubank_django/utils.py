@@ -1,5 +1,26 @@
+import unicodedata
 from decimal import Decimal
+from typing import Optional
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    """Exact conversion of an integer amount of cents, e.g. 3290 -> Decimal("32.90")."""
+    return Decimal(cents).scaleb(-2)
 
 
 def amount_to_decimal(amount: float) -> Decimal:
-    return Decimal.from_float(amount).quantize(Decimal("1.00"))
+    """
+    Converts an amount in reais, as the account feed sends them, to a 2 places Decimal.
+
+    Scaling to integer cents rounds away the binary representation error (236.1 is
+    236.0999... as a float) before any Decimal is built, so the result matches the
+    amount literally sent by the API.
+    """
+    return cents_to_decimal(round(amount * 100))
+
+
+def normalize_search_text(*values: Optional[str]) -> str:
+    """Casefolded text without accents, e.g. "Serviços" -> "servicos", so searches match either spelling."""
+    text = " ".join(value for value in values if value)
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
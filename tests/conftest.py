@@ -8,6 +8,25 @@ from pytest_djangoapp import configure_djangoapp_plugin
 pytest_plugins = configure_djangoapp_plugin(settings="settings")
 
 
+@pytest.fixture(autouse=True)
+def reset_nubank_session():
+    """Each test starts without the authenticated client kept by the session manager."""
+    from nubank_django.nu import session_manager
+
+    session_manager.reset()
+
+
+@pytest.fixture
+def mocked_http_client():
+    with mock.patch("nubank_django.nu._get_http_client", mock.MagicMock(return_value=MockHttpClient())):
+        yield
+
+
+@pytest.fixture
+def superuser(user_create):
+    return user_create(superuser=True)
+
+
 @pytest.fixture
 def nubank():
     nu = Nubank(MockHttpClient())
@@ -21,16 +40,13 @@ def nu_data_loader():
 
     def _inner():
         # These imports require Django to be up
-        from nubank_django.domain import (
-            full_load_card_statements,
-            full_load_nuconta_statements,
-        )
+        from nubank_django.domain import full_sync
 
         with mock.patch(
             "nubank_django.nu._get_http_client",
             mock.MagicMock(return_value=MockHttpClient()),
         ):
-            full_load_nuconta_statements()
-            full_load_card_statements()
+            results = full_sync()
+        assert not any(stats.error for stats in results.values())
 
     return _inner
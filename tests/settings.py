@@ -16,6 +16,8 @@ INSTALLED_APPS = [
     "django.contrib.auth",
     "django.contrib.sessions",
     "django.contrib.messages",
+    "django_object_actions",
+    "rangefilter",
     "nubank_django",
     "tests",
 ]
@@ -63,3 +65,6 @@ DATABASES = {
 }
 
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
+
+# Imports run inline instead of on a background thread, so tests can check their results.
+NUBANK_IMPORT_JOBS_EAGER = True
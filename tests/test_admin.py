@@ -1,3 +1,6 @@
+import csv
+import gzip
+import io
 from unittest import mock
 from http import HTTPStatus
 
@@ -10,12 +13,6 @@ from nubank_django.admin import CardStatementAdmin, AccountStatementAdmin
 from nubank_django.models import CardStatement, AccountStatement
 
 
-@pytest.fixture
-def superuser(user_create):
-    user = user_create(superuser=True)
-    return user
-
-
 @pytest.fixture
 def card_statement_admin():
     return CardStatementAdmin(CardStatement, site)
@@ -95,3 +92,48 @@ def test_card_import_action(superuser, card_statement_admin, request_get):
 
     # Confirm the correct execution by checking DB rows have been placed
     assert CardStatement.objects.exists()
+
+
+@pytest.mark.parametrize("model", [CardStatement, AccountStatement])
+def test_statement_changelists_load_only_listed_columns(superuser, request_get, nu_data_loader, db_queries, model):
+    nu_data_loader()
+    model_admin = site._registry[model]
+    request = request_get(reverse(f"admin:nubank_django_{model._meta.model_name}_changelist"), user=superuser)
+
+    db_queries.clear()
+    model_admin.changelist_view(request).render()
+    [listing] = [query for query in db_queries.sql() if "LIMIT" in query and "COUNT" not in query]
+    assert '"details"' not in listing
+    assert '"search_text"' not in listing
+    # Deferred columns are never fetched row by row while rendering.
+    assert len([query for query in db_queries.sql() if f"{model._meta.db_table}" in query]) <= 2
+
+
+def test_for_analytics_loads_only_what_aggregations_need(nu_data_loader, db_queries):
+    nu_data_loader()
+    db_queries.clear()
+    statements = list(AccountStatement.objects.for_analytics())
+
+    assert sum(statement.amount for statement in statements) > 0
+    assert {statement.counterparty for statement in statements} - {""}
+    assert len(db_queries) == 1
+    assert '"detail"' not in db_queries.sql()[0]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_export_action_streams_selected_statements(
+    superuser, card_statement_admin, request_get, nu_data_loader, compress
+):
+    nu_data_loader()
+    request = request_get(reverse("admin:nubank_django_cardstatement_changelist"), user=superuser)
+    queryset = CardStatement.objects.order_by("-time")
+
+    action = card_statement_admin.export_csv_gzip if compress else card_statement_admin.export_csv
+    response = action(request, queryset)
+    assert response.streaming
+
+    content = b"".join(response.streaming_content)
+    rows = list(csv.reader(io.StringIO(gzip.decompress(content).decode() if compress else content.decode())))
+    assert rows[0] == list(card_statement_admin.export_fields)
+    assert [row[0] for row in rows[1:]] == [str(statement.nubank_id) for statement in queryset]
+    assert response["Content-Disposition"].endswith('.csv.gz"' if compress else '.csv"')
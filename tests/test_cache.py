@@ -0,0 +1,113 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+
+from nubank_django import cache as feed_cache_module
+from nubank_django.cache import FeedCache, get_cache_stats, reset_cache_stats
+
+
+@pytest.fixture
+def feed():
+    return [{"id": str(index), "amount": index * 1.5, "title": "Transferência"} for index in range(25)]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    reset_cache_stats()
+
+
+@pytest.mark.parametrize("codec", ["json", "orjson"])
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_feed_cache_round_trip(feed, codec, compression):
+    pytest.importorskip(codec)
+    feed_cache = FeedCache(codec=codec, compression=compression, chunk_records=10)
+
+    feed_cache.set("feed", feed, None)
+    assert feed_cache.get("feed") == feed
+    assert cache.get("feed")["chunks"] == 3
+
+
+def test_feed_cache_set_replaces_previous_chunks(feed):
+    feed_cache = FeedCache(chunk_records=10)
+
+    feed_cache.set("feed", feed, None)
+    keys_count = len(cache._cache)
+    feed_cache.set("feed", feed, None)
+    assert len(cache._cache) == keys_count
+    assert feed_cache.get("feed") == feed
+
+
+def test_feed_cache_missing_chunk_is_a_miss(feed):
+    feed_cache = FeedCache(chunk_records=10)
+    feed_cache.set("feed", feed, None)
+
+    manifest = cache.get("feed")
+    cache.delete(f"feed:{manifest['token']}:1")
+    assert feed_cache.get("feed") is None
+
+
+def test_feed_cache_ignores_legacy_json_blob():
+    cache.set("feed", '[{"id": "1"}]')
+    assert FeedCache().get("feed") is None
+
+
+def test_feed_cache_ignores_feed_stored_with_other_codec(feed):
+    FeedCache(compression="none").set("feed", feed, None)
+    assert FeedCache(compression="zlib").get("feed") is None
+
+
+def test_feed_cache_requires_optional_package():
+    with mock.patch.object(feed_cache_module, "msgpack", None):
+        with pytest.raises(ImproperlyConfigured):
+            FeedCache(codec="msgpack")
+
+
+def test_fetch_reads_the_cache_once_filled(feed):
+    feed_cache = FeedCache()
+    fetch_feed = mock.MagicMock(return_value=feed)
+
+    assert feed_cache.fetch("feed", fetch_feed, "push-pull") == feed
+    assert feed_cache.fetch("feed", fetch_feed, "push-pull") == feed
+
+    fetch_feed.assert_called_once()
+    stats = get_cache_stats()["feed"]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["bytes_read"] == stats["bytes_written"]
+
+
+def test_fetch_bypasses_the_cache_when_policy_says_so(feed):
+    feed_cache = FeedCache()
+    fetch_feed = mock.MagicMock(return_value=feed)
+
+    feed_cache.fetch("feed", fetch_feed, "ignore")
+    feed_cache.fetch("feed", fetch_feed, "ignore")
+
+    assert fetch_feed.call_count == 2
+    assert cache.get("feed") is None
+
+
+def test_fetch_serves_stale_feed_while_revalidating(feed):
+    feed_cache = FeedCache(stale_after=0)
+    feed_cache.set("feed", feed)
+    fresh_feed = feed[:1]
+
+    with mock.patch.object(feed_cache, "revalidate") as revalidate:
+        assert feed_cache.fetch("feed", lambda: fresh_feed, "push-pull") == feed
+    revalidate.assert_called_once()
+    assert get_cache_stats()["feed"]["stale_hits"] == 1
+
+    feed_cache.revalidate("feed", lambda: fresh_feed, background=False)
+    assert feed_cache.get("feed") == fresh_feed
+
+
+def test_revalidate_skips_concurrent_refreshes(feed):
+    feed_cache = FeedCache()
+    cache.add("feed:refreshing", 1)
+    fetch_feed = mock.MagicMock(return_value=feed)
+
+    feed_cache.revalidate("feed", fetch_feed, background=False)
+    fetch_feed.assert_not_called()
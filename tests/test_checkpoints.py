@@ -0,0 +1,94 @@
+from unittest import mock
+
+import pytest
+from pynubank import MockHttpClient
+
+from nubank_django import domain
+from nubank_django.checkpoints import (
+    advance_checkpoint,
+    card_statement_time,
+    get_checkpoint,
+    records_after_checkpoint,
+    records_not_committed,
+)
+from nubank_django.models import CardStatement, SyncCheckpoint
+
+
+@pytest.fixture
+def raw_card_feed():
+    return [
+        {"id": "c", "time": "2021-04-21T10:01:48Z"},
+        {"id": "b", "time": "2021-04-13T13:55:51Z"},
+        {"id": "a", "time": "2021-04-13T13:55:51Z"},
+        {"id": "z", "time": "2021-03-21T10:56:13Z"},
+    ]
+
+
+def test_checkpoint_without_high_water_mark_yields_everything(raw_card_feed):
+    checkpoint = get_checkpoint(SyncCheckpoint.CARD_STATEMENTS)
+    assert list(records_after_checkpoint(raw_card_feed, checkpoint, card_statement_time)) == raw_card_feed
+
+
+def test_advance_checkpoint_keeps_ids_at_the_boundary(raw_card_feed):
+    checkpoint = get_checkpoint(SyncCheckpoint.CARD_STATEMENTS)
+    advance_checkpoint(checkpoint, raw_card_feed[1:], card_statement_time)
+
+    checkpoint.refresh_from_db()
+    assert checkpoint.high_water_mark == card_statement_time(raw_card_feed[1])
+    assert checkpoint.boundary_ids == ["a", "b"]
+
+
+def test_records_after_checkpoint_stops_at_synced_records(raw_card_feed):
+    checkpoint = get_checkpoint(SyncCheckpoint.CARD_STATEMENTS)
+    advance_checkpoint(checkpoint, [raw_card_feed[1]], card_statement_time)
+
+    records = list(records_after_checkpoint(raw_card_feed, checkpoint, card_statement_time))
+    assert [record["id"] for record in records] == ["c", "a"]
+
+
+@mock.patch("nubank_django.nu._get_http_client", mock.MagicMock(return_value=MockHttpClient()))
+def test_incremental_card_load_skips_already_synced_statements():
+    domain.full_load_card_statements()
+    count_after_full_load = CardStatement.objects.count()
+
+    with mock.patch.object(domain, "persist_card_statements", wraps=domain.persist_card_statements) as persist:
+        domain.full_load_card_statements(incremental=True)
+
+    persist.assert_not_called()
+    assert CardStatement.objects.count() == count_after_full_load
+
+
+def test_records_not_committed_skips_span_of_interrupted_load(raw_card_feed):
+    checkpoint = get_checkpoint(SyncCheckpoint.CARD_STATEMENTS)
+    checkpoint.committed_from, checkpoint.committed_from_ids = card_statement_time(raw_card_feed[1]), ["b"]
+    checkpoint.committed_until, checkpoint.committed_until_ids = card_statement_time(raw_card_feed[1]), ["b"]
+
+    # "c" is newer than the interrupted load, "a" shares its last timestamp but wasn't committed.
+    records = list(records_not_committed(raw_card_feed, checkpoint, card_statement_time))
+    assert [record["id"] for record in records] == ["c", "a", "z"]
+
+
+@mock.patch("nubank_django.nu._get_http_client", mock.MagicMock(return_value=MockHttpClient()))
+def test_failed_card_load_resumes_from_last_committed_batch():
+    raw_card_statements = domain.get_raw_card_statements(cache_policy="ignore")
+    persist_card_statements = domain.persist_card_statements
+
+    def fail_on_second_batch(statements, **kwargs):
+        if persist.call_count == 2:
+            raise RuntimeError("Connection lost.")
+        return persist_card_statements(statements, **kwargs)
+
+    with mock.patch.object(domain, "persist_card_statements", side_effect=fail_on_second_batch) as persist:
+        with pytest.raises(RuntimeError):
+            domain.load_card_statements(raw_card_statements, batch_size=2)
+    assert CardStatement.objects.count() == 2
+
+    with mock.patch.object(domain, "persist_card_statements", wraps=persist_card_statements) as persist:
+        stats = domain.load_card_statements(raw_card_statements, batch_size=2)
+
+    assert [len(call.args[0]) for call in persist.call_args_list] == [2, 1]
+    assert stats.inserted == len(raw_card_statements) - 2
+    assert CardStatement.objects.count() == len(raw_card_statements)
+    checkpoint = get_checkpoint(SyncCheckpoint.CARD_STATEMENTS)
+    assert checkpoint.committed_from is None
+    assert checkpoint.high_water_mark == card_statement_time(raw_card_statements[0])
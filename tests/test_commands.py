@@ -0,0 +1,91 @@
+import json
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from nubank_django import domain
+from nubank_django.checkpoints import (
+    card_statement_time,
+    get_checkpoint,
+    records_not_committed,
+)
+from nubank_django.models import AccountStatement, CardStatement, SyncCheckpoint
+from nubank_django.ndjson import iter_feed
+
+
+@pytest.fixture
+def raw_card_statements(nubank):
+    return nubank.get_card_statements()
+
+
+def test_sync_command_loads_and_reports(mocked_http_client):
+    stdout = StringIO()
+    call_command("nubank_sync", "--batch-size", "2", stdout=stdout)
+
+    output = stdout.getvalue()
+    assert CardStatement.objects.exists()
+    assert AccountStatement.objects.exists()
+    assert f"inserted {CardStatement.objects.count()}" in output
+    assert "rows/s" in output
+
+
+def test_sync_command_dry_run_saves_nothing(mocked_http_client):
+    stdout = StringIO()
+    call_command("nubank_sync", "--source", "card", "--dry-run", stdout=stdout)
+
+    assert not CardStatement.objects.exists()
+    assert "inserted 5" in stdout.getvalue()
+    assert "Dry run" in stdout.getvalue()
+
+
+def test_sync_command_reads_exported_file(raw_card_statements, tmp_path):
+    input_path = tmp_path / "card_statements.json"
+    input_path.write_text(json.dumps(raw_card_statements))
+
+    call_command("nubank_sync", "--source", "card", "--input", str(input_path), stdout=StringIO())
+    assert CardStatement.objects.count() == len(raw_card_statements)
+
+
+def test_sync_command_input_ignores_span_of_interrupted_api_load(raw_card_statements, tmp_path):
+    checkpoint = get_checkpoint(SyncCheckpoint.CARD_STATEMENTS)
+    checkpoint.committed_from = card_statement_time(raw_card_statements[0])
+    checkpoint.committed_from_ids = [raw_card_statements[0]["id"]]
+    checkpoint.committed_until = card_statement_time(raw_card_statements[-1])
+    checkpoint.committed_until_ids = [raw_card_statements[-1]["id"]]
+    checkpoint.save()
+    assert not list(records_not_committed(raw_card_statements, checkpoint, card_statement_time))
+    input_path = tmp_path / "card_statements.json"
+    input_path.write_text(json.dumps(raw_card_statements))
+
+    call_command("nubank_sync", "--source", "card", "--input", str(input_path), stdout=StringIO())
+    assert CardStatement.objects.count() == len(raw_card_statements)
+
+
+def test_sync_command_input_requires_single_source(tmp_path):
+    with pytest.raises(CommandError):
+        call_command("nubank_sync", "--input", str(tmp_path / "feed.json"))
+
+
+def test_sync_command_fails_when_a_source_fails(mocked_http_client):
+    failing_sources = {
+        SyncCheckpoint.CARD_STATEMENTS: (mock.MagicMock(side_effect=ValueError), domain.load_card_statements),
+    }
+    with mock.patch.dict(domain.SYNC_SOURCES, failing_sources):
+        with pytest.raises(CommandError):
+            call_command("nubank_sync", stdout=StringIO())
+
+    assert AccountStatement.objects.exists()
+
+
+def test_exported_feed_is_replayed_by_sync_command(mocked_http_client, tmp_path):
+    output = str(tmp_path / "nuconta.ndjson.gz")
+    call_command("nubank_export", "--source", "nuconta", "--output", output, stdout=StringIO())
+
+    stdout = StringIO()
+    call_command("nubank_sync", "--source", "nuconta", "--input", output, "--batch-size", "3", stdout=stdout)
+
+    fetched = sum(1 for _ in iter_feed(output))
+    assert f"fetched {fetched}" in stdout.getvalue()
+    assert AccountStatement.objects.count() > 0
@@ -0,0 +1,110 @@
+import copy
+
+import pytest
+from django.contrib.admin import site
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+
+from nubank_django import domain
+from nubank_django.admin import CardStatementAdmin
+from nubank_django.facets import get_facet_values, has_null_values, rebuild_facets
+from nubank_django.models import CardStatement, StatementFacet
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def raw_card_statements(nubank):
+    return copy.deepcopy(nubank.get_card_statements())
+
+
+@pytest.fixture
+def parsed_card_statements(raw_card_statements):
+    return domain.parse_card_statements(raw_card_statements)
+
+
+def _source_filter_choices(request_get, user):
+    model_admin = CardStatementAdmin(CardStatement, site)
+    url = reverse("admin:nubank_django_cardstatement_changelist")
+    changelist = model_admin.get_changelist_instance(request_get(url, user=user))
+    return [choice["display"] for choice in changelist.filter_specs[1].choices(changelist)]
+
+
+def test_persisting_records_new_facet_values(parsed_card_statements, db_queries):
+    domain.persist_card_statements(parsed_card_statements)
+    titles = set(CardStatement.objects.values_list("title", flat=True))
+    assert set(get_facet_values(CardStatement, "title")) == titles
+
+    # Once cached, known values cost no queries.
+    get_facet_values(CardStatement, "source")
+    db_queries.clear()
+    domain.persist_card_statements(parsed_card_statements)
+    assert not [query for query in db_queries.sql() if "statementfacet" in query]
+
+
+def test_list_filters_read_facets_instead_of_the_table(parsed_card_statements, user_create, request_get, db_queries):
+    domain.persist_card_statements(parsed_card_statements)
+    StatementFacet.objects.create(model_name="cardstatement", field_name="title", value="only in facets")
+    cache.clear()
+    model_admin = CardStatementAdmin(CardStatement, site)
+    url = reverse("admin:nubank_django_cardstatement_changelist")
+
+    db_queries.clear()
+    changelist = model_admin.get_changelist_instance(request_get(url, user=user_create(superuser=True)))
+    title_filter = changelist.filter_specs[0]
+    choices = [choice["display"] for choice in title_filter.choices(changelist)]
+
+    assert "only in facets" in choices
+    assert not [query for query in db_queries.sql() if "DISTINCT" in query]
+
+
+def test_updates_prune_values_left_without_statements(raw_card_statements):
+    domain.persist_card_statements(domain.parse_card_statements(raw_card_statements))
+    assert "outros" in get_facet_values(CardStatement, "title")
+    for statement in raw_card_statements:
+        if statement["title"] == "outros":
+            statement["title"] = "lazer"
+
+    domain.persist_card_statements(domain.parse_card_statements(raw_card_statements), upsert=True)
+    assert "outros" not in get_facet_values(CardStatement, "title")
+    assert "lazer" in get_facet_values(CardStatement, "title")
+
+
+def test_rebuild_facets_drops_values_of_deleted_statements(parsed_card_statements):
+    domain.persist_card_statements(parsed_card_statements)
+    CardStatement.objects.filter(title="outros").delete()
+    assert "outros" in get_facet_values(CardStatement, "title")
+
+    rebuild_facets()
+    assert set(get_facet_values(CardStatement, "title")) == set(CardStatement.objects.values_list("title", flat=True))
+
+
+def test_null_choice_only_when_null_values_exist(raw_card_statements, superuser, request_get):
+    domain.persist_card_statements(domain.parse_card_statements(raw_card_statements))
+    choices = _source_filter_choices(request_get, superuser)
+    assert "upfront_national" in choices
+    assert site.empty_value_display not in choices
+
+    without_source = {**raw_card_statements[0], "id": "b4ad3a0c-2b1a-4a8e-9e3b-0a3f1c2d4e5f", "source": None}
+    domain.persist_card_statements(domain.parse_card_statements([without_source]))
+    assert site.empty_value_display in _source_filter_choices(request_get, superuser)
+
+
+def test_rolled_back_persist_keeps_cached_facets(raw_card_statements):
+    domain.persist_card_statements(domain.parse_card_statements(raw_card_statements))
+    assert not has_null_values(CardStatement, "source")
+    titles = get_facet_values(CardStatement, "title")
+
+    new_statement = {**raw_card_statements[0], "id": "b4ad3a0c-2b1a-4a8e-9e3b-0a3f1c2d4e5f", "source": None}
+    new_statement["title"] = "viagem"
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            domain.persist_card_statements(domain.parse_card_statements([new_statement]))
+            raise RuntimeError("Rolled back.")
+
+    assert not has_null_values(CardStatement, "source")
+    assert get_facet_values(CardStatement, "title") == titles
@@ -0,0 +1,81 @@
+import pytest
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+
+from nubank_django import domain
+from nubank_django.instrumentation import (
+    counter_incremented,
+    metrics_view,
+    reset_metrics,
+    stage,
+    stage_finished,
+)
+from nubank_django.models import CardStatement
+
+pytestmark = pytest.mark.usefixtures("mocked_http_client")
+
+
+@pytest.fixture
+def received():
+    events = []
+
+    def _stage(metrics, **kwargs):
+        events.append(metrics)
+
+    def _counter(name, value, tags, **kwargs):
+        events.append((name, value, tags))
+
+    stage_finished.connect(_stage)
+    counter_incremented.connect(_counter)
+    with override_settings(NUBANK_METRICS_SINKS=["nubank_django.instrumentation.SignalSink"]):
+        yield events
+    stage_finished.disconnect(_stage)
+    counter_incremented.disconnect(_counter)
+
+
+def test_load_stages_are_reported_with_queries_and_rows(received):
+    domain.full_load_card_statements(batch_size=2)
+
+    stages = [event for event in received if not isinstance(event, tuple)]
+    assert {metrics.name for metrics in stages} == {"fetch", "parse", "persist", "dedup", "bulk_create", "aggregates"}
+    assert all(metrics.tags["source"] == "card_statements" for metrics in stages)
+
+    bulk_creates = [metrics for metrics in stages if metrics.name == "bulk_create"]
+    assert sum(metrics.rows for metrics in bulk_creates) == CardStatement.objects.count()
+    assert all(metrics.queries >= 1 for metrics in bulk_creates)
+    assert (
+        "statements",
+        CardStatement.objects.count(),
+        {"source": "card_statements", "outcome": "inserted"},
+    ) in received
+
+
+def test_rejects_are_counted_by_reason(received):
+    domain.full_load_nuconta_statements(bulk_validation=True)
+
+    rejects = [event for event in received if isinstance(event, tuple) and event[0] == "rejects"]
+    assert ("rejects", 2, {"source": "account_statements", "reason": "gql_typename: invalid choice"}) in rejects
+
+
+def test_stage_decorator_measures_each_call(received):
+    @stage("custom", source="test")
+    def work(fail=False):
+        if fail:
+            raise ValueError
+
+    work()
+    with pytest.raises(ValueError):
+        work(fail=True)
+    assert [(metrics.name, metrics.failed) for metrics in received] == [("custom", False), ("custom", True)]
+
+
+def test_metrics_view_renders_prometheus_text():
+    cache.clear()
+    reset_metrics()
+    domain.full_load_card_statements()
+
+    body = metrics_view(RequestFactory().get("/metrics")).content.decode()
+    assert "# TYPE nubank_stage_seconds_total counter" in body
+    assert 'nubank_stage_calls_total{source="card_statements",stage="persist"} 1' in body
+    assert 'nubank_cache_misses_total{key="card_statements"}' in body
+    assert 'nubank_statements_total{outcome="inserted",source="card_statements"} 5' in body
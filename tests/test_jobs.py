@@ -0,0 +1,86 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from nubank_django.jobs import ImportAlreadyRunning, enqueue_import
+from nubank_django.models import CardStatement, ImportJob, SyncCheckpoint
+
+
+def test_eager_import_job_runs_and_stores_stats(mocked_http_client):
+    job = enqueue_import(SyncCheckpoint.CARD_STATEMENTS)
+
+    assert job.status == ImportJob.SUCCEEDED
+    assert job.stats["inserted"] == CardStatement.objects.count() > 0
+    assert job.progress == job.total == job.stats["fetched"]
+
+
+def test_failed_import_job_keeps_error():
+    with mock.patch.dict(
+        "nubank_django.jobs.LOADERS", {SyncCheckpoint.CARD_STATEMENTS: mock.MagicMock(side_effect=ValueError("boom"))}
+    ):
+        job = enqueue_import(SyncCheckpoint.CARD_STATEMENTS)
+
+    assert job.status == ImportJob.FAILED
+    assert "ValueError: boom" in job.error
+
+
+def test_overlapping_imports_are_refused():
+    ImportJob.objects.create(source=SyncCheckpoint.CARD_STATEMENTS, status=ImportJob.RUNNING, started_at=timezone.now())
+    with pytest.raises(ImportAlreadyRunning):
+        enqueue_import(SyncCheckpoint.CARD_STATEMENTS)
+
+
+def test_overlapping_imports_are_refused_without_the_database_constraint():
+    # MySQL/MariaDB don't create the partial unique constraint, the insert would go through there.
+    ImportJob.objects.create(source=SyncCheckpoint.CARD_STATEMENTS, status=ImportJob.QUEUED)
+    with mock.patch.object(ImportJob.objects, "create") as create:
+        with pytest.raises(ImportAlreadyRunning):
+            enqueue_import(SyncCheckpoint.CARD_STATEMENTS)
+    create.assert_not_called()
+
+
+@override_settings(NUBANK_IMPORT_JOB_TIMEOUT=0)
+def test_abandoned_import_does_not_block_new_ones(mocked_http_client):
+    abandoned = ImportJob.objects.create(
+        source=SyncCheckpoint.CARD_STATEMENTS, status=ImportJob.RUNNING, started_at=timezone.now()
+    )
+    job = enqueue_import(SyncCheckpoint.CARD_STATEMENTS)
+
+    abandoned.refresh_from_db()
+    assert abandoned.status == ImportJob.FAILED
+    assert job.status == ImportJob.SUCCEEDED
+
+
+@override_settings(NUBANK_IMPORT_JOB_TIMEOUT=60)
+def test_slow_import_still_reporting_progress_is_not_abandoned():
+    an_hour_ago = timezone.now() - timedelta(hours=1)
+    ImportJob.objects.create(
+        source=SyncCheckpoint.CARD_STATEMENTS,
+        status=ImportJob.RUNNING,
+        started_at=an_hour_ago,
+        heartbeat_at=timezone.now(),
+    )
+    with pytest.raises(ImportAlreadyRunning):
+        enqueue_import(SyncCheckpoint.CARD_STATEMENTS)
+
+
+def test_incremental_import_job_progress_reaches_total(mocked_http_client):
+    enqueue_import(SyncCheckpoint.CARD_STATEMENTS)
+    job = enqueue_import(SyncCheckpoint.CARD_STATEMENTS, incremental=True)
+
+    assert job.status == ImportJob.SUCCEEDED
+    assert job.stats["parsed"] + job.stats["rejected"] < job.stats["fetched"]
+    assert job.progress == job.total == job.stats["fetched"]
+
+
+@override_settings(NUBANK_IMPORT_JOBS_EAGER=False)
+def test_import_job_is_queued_for_background_execution():
+    with mock.patch("nubank_django.jobs.transaction.on_commit") as on_commit:
+        job = enqueue_import(SyncCheckpoint.ACCOUNT_STATEMENTS, incremental=True)
+
+    on_commit.assert_called_once()
+    assert job.status == ImportJob.QUEUED
+    assert job.options == {"incremental": True}
@@ -0,0 +1,37 @@
+from unittest import mock
+
+import pytest
+
+from nubank_django import ndjson
+
+
+@pytest.fixture
+def feed():
+    return [{"id": str(index), "detail": "Transferência\nR$ 1,00", "amount": 1.0} for index in range(10)]
+
+
+@pytest.mark.parametrize("filename", ["feed.ndjson", "feed.ndjson.gz"])
+def test_feed_round_trip(feed, tmp_path, filename):
+    path = str(tmp_path / filename)
+    assert ndjson.write_feed(path, iter(feed)) == len(feed)
+    assert list(ndjson.iter_feed(path)) == feed
+
+
+def test_gzip_is_detected_by_content(feed, tmp_path):
+    path = str(tmp_path / "feed.ndjson.gz")
+    ndjson.write_feed(path, feed)
+    renamed = tmp_path / "feed.ndjson"
+    (tmp_path / "feed.ndjson.gz").rename(renamed)
+
+    assert list(ndjson.iter_feed(str(renamed))) == feed
+
+
+def test_large_feed_is_memory_mapped(feed, tmp_path):
+    path = str(tmp_path / "feed.ndjson")
+    ndjson.write_feed(path, feed)
+
+    with mock.patch.object(ndjson, "MMAP_THRESHOLD", 0), mock.patch.object(
+        ndjson.mmap, "mmap", wraps=ndjson.mmap.mmap
+    ) as mapped:
+        assert list(ndjson.iter_feed(path)) == feed
+    mapped.assert_called_once()
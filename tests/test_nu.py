@@ -1,9 +1,13 @@
 import os
+import time
 from unittest import mock
 
 import pytest
+from django.core.cache import cache
+from django.test import override_settings
+from pynubank import Nubank
 
-from nubank_django import nu
+from nubank_django import domain, nu
 
 
 @pytest.mark.parametrize(
@@ -28,3 +32,122 @@ def test_get_credentials_with_all_env_vars():
     mocked_getenv = mock.MagicMock(side_effect=["some_cpf", "some_password", cert_path])
     with mock.patch("os.getenv", mocked_getenv):
         nu._get_credentials()
+
+
+@mock.patch.object(nu, "Pkcs12Adapter")
+@mock.patch.object(nu.requests, "Session")
+def test_pooled_http_client_sends_requests_through_one_session(session_class, adapter_class):
+    session = session_class.return_value
+    session.get.return_value = session.post.return_value = mock.MagicMock(status_code=200, json=lambda: {"ok": True})
+    http_client = nu._get_http_client()
+    assert isinstance(http_client, nu.PooledHttpClient)
+
+    http_client.set_cert("caminho/do_certificado.p12")
+    adapter_class.assert_called_once_with(pkcs12_filename="caminho/do_certificado.p12", pkcs12_password="")
+    session.mount.assert_called_once_with("https://", adapter_class.return_value)
+
+    assert http_client.get("https://prod-s0-webapp-proxy.nubank.com.br/api/discovery") == {"ok": True}
+    assert http_client.post("https://prod-s0-webapp-proxy.nubank.com.br/api/token", json={}) == {"ok": True}
+    session_class.assert_called_once_with()
+    assert session.get.call_args.kwargs["headers"] is http_client._headers
+    assert session.post.call_args.kwargs == {"json": {}, "headers": http_client._headers}
+
+
+@pytest.fixture
+def count_logins(mocked_http_client):
+    with mock.patch.object(nu.NubankClient, "authenticate_with_cert", autospec=True) as login:
+        login.side_effect = Nubank.authenticate_with_cert
+        yield login
+
+
+def test_authed_client_is_reused_between_calls(count_logins):
+    first_client = nu.get_authed_nu_client()
+    second_client = nu.get_authed_nu_client()
+
+    assert first_client is second_client
+    assert count_logins.call_count == 1
+
+
+def test_back_to_back_imports_login_once(count_logins):
+    domain.get_raw_card_statements(cache_policy="ignore")
+    domain.get_raw_account_statements(cache_policy="ignore")
+    assert count_logins.call_count == 1
+
+
+def test_expiring_session_is_refreshed_with_refresh_token(count_logins):
+    client = nu.get_authed_nu_client()
+    client.auth_data = {**client.auth_data, "refresh_token": "refresh-token-123"}
+    client.expires_at = time.time() + 10
+
+    with mock.patch.object(nu.NubankClient, "authenticate_with_refresh_token", autospec=True) as refresh:
+        refresh.side_effect = Nubank.authenticate_with_refresh_token
+        refreshed_client = nu.get_authed_nu_client()
+
+    assert refreshed_client is not client
+    assert refreshed_client._client is client._client
+    refresh.assert_called_once_with(refreshed_client, "refresh-token-123", "fake-cert_path")
+    assert count_logins.call_count == 1
+
+
+@override_settings(NUBANK_SESSION_CACHE=True)
+def test_session_is_shared_through_django_cache(count_logins):
+    cache.delete(nu.NUBANK_SESSION_CACHE_KEY)
+    nu.get_authed_nu_client()
+    nu.session_manager.reset()
+
+    client = nu.get_authed_nu_client()
+    assert count_logins.call_count == 1
+    assert client.get_card_statements(cache_policy="ignore")
+
+
+@pytest.fixture
+def raw_account_feed():
+    return [
+        {
+            "id": "1",
+            "__typename": "TransferInEvent",
+            "title": "Transferência recebida",
+            "detail": "R$ 10,00",
+            "amount": 10.0,
+        },
+        {
+            "id": "2",
+            "__typename": "GenericFeedEvent",
+            "title": "Transferência enviada",
+            "detail": "Fulano\nR$ 1.234,56",
+        },
+        {"id": "3", "__typename": "GenericFeedEvent", "title": "Compra no débito", "detail": "Padaria\nR$ 5,00"},
+        {"id": "4", "__typename": "AddToReserveEvent", "title": "Dinheiro guardado", "detail": "R$ 50,00"},
+    ]
+
+
+def test_normalize_account_feed_maps_pix_and_reserve_events(raw_account_feed):
+    normalized = nu.normalize_account_feed(raw_account_feed)
+
+    assert [(event["id"], event["__typename"], event["amount"]) for event in normalized] == [
+        ("1", "TransferInEvent", 10.0),
+        ("2", "PixTransferOutEvent", 1234.56),
+        ("4", "AddToReserveEvent", 50.0),
+    ]
+
+
+def test_normalized_account_feed_is_not_parsed_again(raw_account_feed):
+    normalized = nu.normalize_account_feed(raw_account_feed)
+
+    with mock.patch.object(nu, "parse_brl_amount") as parse_brl_amount:
+        assert nu.normalize_account_feed(normalized) == normalized
+    parse_brl_amount.assert_not_called()
+
+
+def test_account_feed_is_cached_normalized(mocked_http_client):
+    cache.clear()
+    client = nu.get_authed_nu_client()
+    feed = client.get_account_feed_with_pix_mapping(cache_policy="push-pull")
+
+    with mock.patch.object(nu, "parse_brl_amount") as parse_brl_amount, mock.patch.object(
+        client, "get_account_feed"
+    ) as get_account_feed:
+        assert client.get_account_feed_with_pix_mapping(cache_policy="push-pull") == feed
+    get_account_feed.assert_not_called()
+    parse_brl_amount.assert_not_called()
+    assert not any(event["__typename"] == "GenericFeedEvent" for event in feed)
@@ -1,9 +1,13 @@
+import copy
 from unittest import mock
 
 import pytest
+from django.core.cache import cache
+from django.db import connection
 from pynubank import MockHttpClient
 
 from nubank_django import domain
+from nubank_django.cache import get_cache_stats, reset_cache_stats
 from nubank_django.models import CardStatement
 
 
@@ -39,3 +43,104 @@ def test_persisting_card_statements_avoids_duplication(parsed_card_statements):
     domain.persist_card_statements(parsed_card_statements)
     count_after_second_run = CardStatement.objects.count()
     assert count_after_first_run == count_after_second_run
+
+
+def test_persisting_card_statements_ignores_repeated_ids_within_batch(parsed_card_statements):
+    domain.persist_card_statements(parsed_card_statements + parsed_card_statements[:2])
+    assert CardStatement.objects.count() == len(parsed_card_statements)
+
+
+@mock.patch("nubank_django.domain.NUBANK_ID_LOOKUP_CHUNK_SIZE", 2)
+def test_persisting_card_statements_looks_up_existing_ids_in_chunks(parsed_card_statements, db_queries):
+    domain.persist_card_statements(parsed_card_statements[:3])
+    db_queries.clear()
+
+    domain.persist_card_statements(parsed_card_statements)
+    lookups = [query for query in db_queries.sql() if '"nubank_id" IN' in query]
+    assert len(lookups) == 3
+    assert CardStatement.objects.count() == len(parsed_card_statements)
+
+
+@mock.patch("nubank_django.nu._get_http_client", mock.MagicMock(return_value=MockHttpClient()))
+def test_full_load_persists_card_statements_in_batches():
+    raw_card_statements = domain.get_raw_card_statements(cache_policy="ignore")
+    with mock.patch.object(domain, "persist_card_statements", wraps=domain.persist_card_statements) as persist:
+        domain.full_load_card_statements(batch_size=2)
+
+    assert [len(call.args[0]) for call in persist.call_args_list] == [2, 2, 1]
+    assert CardStatement.objects.count() == len(raw_card_statements)
+
+
+@pytest.mark.parametrize("insert_batch_size, expected_inserts", [(2, 3), (1000, 1)])
+def test_persisting_card_statements_inserts_in_batches(
+    parsed_card_statements, db_queries, settings, insert_batch_size, expected_inserts
+):
+    settings.NUBANK_INSERT_BATCH_SIZE = insert_batch_size
+    db_queries.clear()
+    domain.persist_card_statements(parsed_card_statements)
+
+    inserts = [
+        query for query in db_queries.sql() if query.startswith('INSERT OR IGNORE INTO "nubank_django_cardstatement"')
+    ]
+    assert len(inserts) == expected_inserts
+
+
+def test_insert_batch_size_follows_backend_parameters_limit(parsed_card_statements, settings):
+    settings.NUBANK_INSERT_BATCH_SIZE = 10_000
+    fields = len(CardStatement._meta.concrete_fields) - 1
+    expected = connection.features.max_query_params // fields
+    assert domain.insert_batch_size(CardStatement, parsed_card_statements * 1000) == expected
+
+
+def test_bulk_validation_matches_full_validation(nubank, parsed_card_statements):
+    bulk_parsed = domain.parse_card_statements(nubank.get_card_statements(), bulk_validation=True)
+    assert [(s.nubank_id, s.amount, s.time) for s in bulk_parsed] == [
+        (s.nubank_id, s.amount, s.time) for s in parsed_card_statements
+    ]
+
+
+@mock.patch("nubank_django.nu._get_http_client", mock.MagicMock(return_value=MockHttpClient()))
+def test_raw_card_statements_are_cached_in_a_single_layer():
+    cache.clear()
+    reset_cache_stats()
+    domain.get_raw_card_statements(cache_policy="push-pull")
+    domain.get_raw_card_statements(cache_policy="push-pull")
+
+    assert get_cache_stats()["card_statements"] == {
+        "misses": 1,
+        "hits": 1,
+        "bytes_written": mock.ANY,
+        "bytes_read": mock.ANY,
+    }
+
+
+def test_upsert_updates_only_statements_changed_upstream(nubank, parsed_card_statements, db_queries):
+    domain.persist_card_statements(parsed_card_statements)
+    changed = copy.deepcopy(nubank.get_card_statements())
+    changed[0]["details"]["status"] = "pending"
+    changed[1]["amount"] += 100
+
+    insert_only = domain.persist_card_statements(domain.parse_card_statements(changed))
+    assert insert_only.updated == []
+    assert CardStatement.objects.get(nubank_id=changed[0]["id"]).details["status"] != "pending"
+
+    db_queries.clear()
+    result = domain.persist_card_statements(domain.parse_card_statements(changed), upsert=True)
+    assert {str(statement.nubank_id) for statement in result.updated} == {changed[0]["id"], changed[1]["id"]}
+    assert len([query for query in db_queries.sql() if query.startswith('UPDATE "nubank_django_cardstatement"')]) == 1
+    assert CardStatement.objects.get(nubank_id=changed[0]["id"]).details["status"] == "pending"
+    assert CardStatement.objects.count() == len(changed)
+
+    unchanged = domain.persist_card_statements(domain.parse_card_statements(changed), upsert=True)
+    assert unchanged.created == unchanged.updated == []
+
+
+def test_stored_fingerprint_matches_bulk_validated_statements(nubank, parsed_card_statements):
+    domain.persist_card_statements(parsed_card_statements)
+    bulk_parsed = domain.parse_card_statements(nubank.get_card_statements(), bulk_validation=True)
+
+    result = domain.persist_card_statements(bulk_parsed, upsert=True)
+    assert result.updated == []
+    assert {statement.fingerprint for statement in CardStatement.objects.all()} == {
+        statement.compute_fingerprint() for statement in CardStatement.objects.all()
+    }
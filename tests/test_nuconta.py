@@ -57,7 +57,8 @@ def test_can_import_statement(nubank):
 
 def test_can_persist_parsed_account_statements(parsed_account_statements, db_queries):
     persist_parsed_account_statements(parsed_account_statements)
-    assert len(db_queries) == 3
+    # Plus reading and creating the affected monthly summaries.
+    assert len(db_queries) == 5
     assert AccountStatement.objects.count() == len(parsed_account_statements)
 
 
@@ -95,7 +96,50 @@ def test_account_statement_destination_account_name_relates_to_event(
     transfer_out_raw_json, transfer_out_account_statement
 ):
     assert transfer_out_account_statement.account_name == transfer_out_raw_json["destinationAccount"]["name"]
+    assert transfer_out_account_statement.counterparty == transfer_out_account_statement.account_name
 
 
 def test_account_statement_origin_account_name_relates_to_event(transfer_in_raw_json, transfer_in_account_statement):
     assert transfer_in_account_statement.account_name == transfer_in_raw_json["originAccount"]["name"]
+    assert transfer_in_account_statement.counterparty == transfer_in_account_statement.account_name
+
+
+def test_bulk_validation_matches_full_validation(nubank):
+    statements = nubank.get_account_statements()
+    parsed = parse_account_statements(statements)
+    bulk_parsed = parse_account_statements(statements, bulk_validation=True)
+    assert [s.nubank_id for s in bulk_parsed] == [s.nubank_id for s in parsed]
+    assert [s.account_name for s in bulk_parsed] == [s.account_name for s in parsed]
+    assert [s.counterparty for s in bulk_parsed] == [s.account_name or "" for s in parsed]
+
+
+def test_bulk_validation_rejects_invalid_statements(transfer_in_raw_json, transfer_out_raw_json, caplog):
+    invalid_typename = {**transfer_in_raw_json, "__typename": "UnknownEvent"}
+    invalid_uuid = {**transfer_in_raw_json, "id": "not-an-uuid"}
+    out_of_bounds = {**transfer_out_raw_json, "amount": 10.0**10}
+    parsed = parse_account_statements(
+        [transfer_in_raw_json, invalid_typename, invalid_uuid, out_of_bounds], bulk_validation=True
+    )
+
+    assert len(parsed) == 1
+    [record] = [record for record in caplog.records if hasattr(record, "rejects")]
+    assert record.rejects == {
+        "gql_typename: invalid choice": 1,
+        "nubank_id: invalid format": 1,
+        "amount: out of bounds": 1,
+    }
+
+
+def test_counterparty_monthly_totals_is_a_single_indexed_query(nubank, db_queries):
+    persist_parsed_account_statements(parse_account_statements(nubank.get_account_statements()))
+    counterparty = AccountStatement.objects.exclude(counterparty="").values_list("counterparty", flat=True)[0]
+    statements = AccountStatement.objects.filter(counterparty=counterparty)
+
+    db_queries.clear()
+    totals = list(AccountStatement.objects.counterparty_monthly_totals(counterparty))
+    assert len(db_queries) == 1
+    assert sum(row["count"] for row in totals) == statements.count()
+    assert sum((row["inflow"] or 0) + (row["outflow"] or 0) for row in totals) == sum(s.amount for s in statements)
+    assert (
+        "account_counterparty_date_idx" in AccountStatement.objects.counterparty_monthly_totals(counterparty).explain()
+    )
@@ -0,0 +1,73 @@
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import pytest
+from django.contrib.admin import site
+from django.core.cache import cache
+from django.urls import reverse
+
+from nubank_django.admin import AccountStatementAdmin, CardStatementAdmin
+from nubank_django.models import AccountStatement, CardStatement
+from nubank_django.pagination import KEYSET_VAR, EstimatedCountPaginator, estimated_row_count
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+def _changelist(model_admin, request_get, user, **params):
+    url = reverse(f"admin:nubank_django_{model_admin.model._meta.model_name}_changelist")
+    return model_admin.get_changelist_instance(request_get(f"{url}?{urlencode(params)}", user=user))
+
+
+def test_keyset_navigation_walks_all_statements(nu_data_loader, superuser, request_get):
+    nu_data_loader()
+    model_admin = AccountStatementAdmin(AccountStatement, site)
+    model_admin.list_per_page = 2
+
+    seen, params = [], {}
+    for _ in range(AccountStatement.objects.count()):
+        changelist = _changelist(model_admin, request_get, superuser, **params)
+        seen.extend(changelist.result_list)
+        if not changelist.older_url:
+            break
+        params = {KEYSET_VAR: parse_qs(urlparse(changelist.older_url).query)[KEYSET_VAR][0]}
+
+    assert seen == list(AccountStatement.objects.order_by("-post_date", "-pk"))
+
+
+def test_keyset_pages_reuse_the_first_page_count(nu_data_loader, superuser, request_get, db_queries):
+    nu_data_loader()
+    model_admin = CardStatementAdmin(CardStatement, site)
+    model_admin.list_per_page = 2
+    first_page = _changelist(model_admin, request_get, superuser)
+    position = parse_qs(urlparse(first_page.older_url).query)[KEYSET_VAR][0]
+
+    db_queries.clear()
+    older_page = _changelist(model_admin, request_get, superuser, **{KEYSET_VAR: position})
+    assert older_page.result_count == first_page.result_count
+    assert len(older_page.result_list) == 2
+    assert not [query for query in db_queries.sql() if "COUNT(" in query]
+
+
+def test_keyset_navigation_is_disabled_when_sorting_by_a_column(nu_data_loader, superuser, request_get):
+    nu_data_loader()
+    model_admin = CardStatementAdmin(CardStatement, site)
+    model_admin.list_per_page = 2
+
+    changelist = _changelist(model_admin, request_get, superuser, o="4")
+    assert changelist.older_url is None
+
+
+def test_filtered_counts_are_cached(nu_data_loader, db_queries):
+    nu_data_loader()
+    queryset = CardStatement.objects.filter(amount__gt=0).order_by("-time")
+    assert EstimatedCountPaginator(queryset, 2).count == queryset.count()
+
+    db_queries.clear()
+    assert EstimatedCountPaginator(queryset, 2).count == queryset.count()
+    assert len(db_queries) == 1
+
+
+def test_estimates_need_database_support():
+    assert estimated_row_count(CardStatement) is None
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.admin import site
+from django.urls import reverse
+
+from nubank_django.admin import AccountStatementAdmin, CardStatementAdmin
+from nubank_django.models import AccountStatement, CardStatement
+from nubank_django.search import parse_amount, search_statements
+
+
+@pytest.fixture
+def loaded(nu_data_loader):
+    nu_data_loader()
+
+
+@pytest.mark.parametrize(
+    ("term", "expected"),
+    [
+        ("32.90", "32.90"),
+        ("32,90", "32.90"),
+        ("R$ 1.234,56", "1234.56"),
+        ("1234", "1234"),
+        ("-5", "-5"),
+        ("1.234", "1234"),
+        ("netflix", None),
+        ("12 parcelas", None),
+    ],
+)
+def test_parse_amount(term, expected):
+    assert parse_amount(term) == (Decimal(expected) if expected else None)
+
+
+def test_persisted_statements_are_searchable_without_accents(loaded):
+    statement = CardStatement.objects.exclude(title="").first()
+    assert statement.search_text == statement.compute_search_text()
+
+    results = search_statements(CardStatement.objects.all(), "SERVICOS")
+    assert set(results) == {s for s in CardStatement.objects.all() if "serviços" in s.title.lower()}
+
+
+def test_search_by_nubank_id_is_exact(loaded):
+    statement = AccountStatement.objects.first()
+    assert list(search_statements(AccountStatement.objects.all(), str(statement.nubank_id))) == [statement]
+
+
+def test_search_by_start_of_nubank_id(loaded):
+    statement = AccountStatement.objects.first()
+    nubank_id = str(statement.nubank_id)
+
+    assert list(search_statements(AccountStatement.objects.all(), nubank_id[:8].upper())) == [statement]
+    assert list(search_statements(AccountStatement.objects.all(), nubank_id[:13])) == [statement]
+    assert (
+        "nubank_id" not in str(search_statements(AccountStatement.objects.all(), nubank_id[:7]).query).split("WHERE")[1]
+    )
+
+
+def test_search_by_amount_matches_amount_or_text(loaded):
+    statement = AccountStatement.objects.filter(amount=Decimal("236.10")).get()
+    by_amount = search_statements(AccountStatement.objects.all(), "236,10")
+    assert statement in by_amount
+    assert 'amount" =' in str(by_amount.query)
+
+    # No statement is worth R$ 236,00, the number is found in the detail.
+    assert not AccountStatement.objects.filter(amount=236).exists()
+    assert list(search_statements(AccountStatement.objects.all(), "236")) == [statement]
+
+
+def test_admin_search_uses_search_text(loaded, superuser, request_get):
+    account_admin = AccountStatementAdmin(AccountStatement, site)
+    statement = AccountStatement.objects.exclude(destination_account=None).first()
+    term = statement.destination_account.split()[0].upper()
+
+    request = request_get(reverse("admin:nubank_django_accountstatement_changelist"), user=superuser)
+    results, may_have_duplicates = account_admin.get_search_results(request, AccountStatement.objects.all(), term)
+    assert statement in results
+    assert not may_have_duplicates
+    assert "search_text" in str(results.query).split("WHERE")[1]
+
+    card_admin = CardStatementAdmin(CardStatement, site)
+    results, _ = card_admin.get_search_results(request, CardStatement.objects.all(), "")
+    assert results.count() == CardStatement.objects.count()
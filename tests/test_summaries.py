@@ -0,0 +1,81 @@
+import copy
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from pynubank import MockHttpClient
+
+from nubank_django import domain
+from nubank_django.models import (
+    AccountMonthlySummary,
+    AccountStatement,
+    CardMonthlySummary,
+    CardStatement,
+)
+from nubank_django.summaries import rebuild_summaries
+
+
+def _summary_rows(model):
+    return sorted(model.objects.values_list(*[f.name for f in model._meta.fields if f.name != "id"]))
+
+
+@pytest.fixture
+def raw_card_statements(nubank):
+    return copy.deepcopy(nubank.get_card_statements())
+
+
+def test_persisting_updates_card_summaries(raw_card_statements):
+    domain.persist_card_statements(domain.parse_card_statements(raw_card_statements[:2]))
+    domain.persist_card_statements(domain.parse_card_statements(raw_card_statements))
+
+    assert sum(CardMonthlySummary.objects.values_list("count", flat=True)) == CardStatement.objects.count()
+    incremental = _summary_rows(CardMonthlySummary)
+    rebuild_summaries()
+    assert _summary_rows(CardMonthlySummary) == incremental
+
+
+def test_upserts_move_amounts_between_summaries(raw_card_statements):
+    domain.persist_card_statements(domain.parse_card_statements(raw_card_statements))
+    raw_card_statements[0]["amount"] += 1000
+    raw_card_statements[1]["title"] = "outros"
+
+    domain.persist_card_statements(domain.parse_card_statements(raw_card_statements), upsert=True)
+    incremental = _summary_rows(CardMonthlySummary)
+    rebuild_summaries()
+    assert _summary_rows(CardMonthlySummary) == incremental
+    assert CardMonthlySummary.objects.filter(title="outros").exists()
+
+
+@mock.patch("nubank_django.nu._get_http_client", mock.MagicMock(return_value=MockHttpClient()))
+def test_account_summaries_match_rebuild():
+    domain.full_load_nuconta_statements(batch_size=3)
+
+    assert sum(AccountMonthlySummary.objects.values_list("count", flat=True)) == AccountStatement.objects.count()
+    assert AccountMonthlySummary.objects.exclude(counterparty="").exists()
+    incremental = _summary_rows(AccountMonthlySummary)
+    rebuild_summaries()
+    assert _summary_rows(AccountMonthlySummary) == incremental
+
+
+def test_rebuild_summaries_command(raw_card_statements):
+    domain.persist_card_statements(domain.parse_card_statements(raw_card_statements))
+    CardMonthlySummary.objects.all().delete()
+
+    stdout = StringIO()
+    call_command("nubank_rebuild_summaries", stdout=stdout)
+    assert CardMonthlySummary.objects.exists()
+    assert "card monthly summaries" in stdout.getvalue()
+
+
+def test_migration_fills_summaries_of_existing_statements(raw_card_statements):
+    domain.persist_card_statements(domain.parse_card_statements(raw_card_statements))
+    rebuild_summaries()
+    expected = _summary_rows(CardMonthlySummary)
+    CardMonthlySummary.objects.all().delete()
+
+    migration = import_module("nubank_django.migrations.0014_fill_monthly_summaries")
+    migration.fill_summaries(apps, None)
+    assert _summary_rows(CardMonthlySummary) == expected
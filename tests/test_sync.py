@@ -0,0 +1,68 @@
+import threading
+from unittest import mock
+
+import pytest
+
+from nubank_django import domain
+from nubank_django.models import AccountStatement, CardStatement, SyncCheckpoint
+
+pytestmark = pytest.mark.usefixtures("mocked_http_client")
+
+
+def _meeting(barrier, fetch_raw):
+    def _inner(*args, **kwargs):
+        # Raises BrokenBarrierError, after the timeout, unless the other fetch is running too.
+        barrier.wait()
+        return fetch_raw(*args, **kwargs)
+
+    return _inner
+
+
+def test_full_sync_loads_all_sources():
+    results = domain.full_sync()
+
+    card_stats = results[SyncCheckpoint.CARD_STATEMENTS]
+    account_stats = results[SyncCheckpoint.ACCOUNT_STATEMENTS]
+    assert card_stats.inserted == CardStatement.objects.count() > 0
+    assert account_stats.inserted == AccountStatement.objects.count() > 0
+    assert set(card_stats.timings) == {"fetch", "parse", "persist"}
+
+
+def test_full_sync_fetches_sources_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    meeting_sources = {
+        SyncCheckpoint.CARD_STATEMENTS: (
+            _meeting(barrier, domain.get_raw_card_statements),
+            domain.load_card_statements,
+        ),
+        SyncCheckpoint.ACCOUNT_STATEMENTS: (
+            _meeting(barrier, domain.get_raw_account_statements),
+            domain.load_nuconta_statements,
+        ),
+    }
+    with mock.patch.dict(domain.SYNC_SOURCES, meeting_sources):
+        results = domain.full_sync()
+
+    assert not any(stats.error for stats in results.values())
+
+
+def test_full_sync_isolates_source_errors():
+    failing_sources = {
+        SyncCheckpoint.CARD_STATEMENTS: (mock.MagicMock(side_effect=ValueError), domain.load_card_statements),
+    }
+    with mock.patch.dict(domain.SYNC_SOURCES, failing_sources):
+        results = domain.full_sync()
+
+    assert isinstance(results[SyncCheckpoint.CARD_STATEMENTS].error, ValueError)
+    assert results[SyncCheckpoint.ACCOUNT_STATEMENTS].error is None
+    assert AccountStatement.objects.exists()
+    assert not CardStatement.objects.exists()
+
+
+def test_full_sync_reports_rejected_and_skipped_statements():
+    domain.full_sync(sources=[SyncCheckpoint.ACCOUNT_STATEMENTS])
+    stats = domain.full_sync(sources=[SyncCheckpoint.ACCOUNT_STATEMENTS])[SyncCheckpoint.ACCOUNT_STATEMENTS]
+
+    assert stats.inserted == 0
+    assert stats.skipped == stats.parsed == AccountStatement.objects.count()
+    assert stats.rejected == stats.fetched - stats.parsed
@@ -0,0 +1,22 @@
+from decimal import Decimal
+
+import pytest
+
+from nubank_django.utils import amount_to_decimal, cents_to_decimal
+
+
+@pytest.mark.parametrize(
+    ("cents", "expected"),
+    [(3290, "32.90"), (5, "0.05"), (0, "0.00"), (-30877, "-308.77")],
+)
+def test_cents_to_decimal_is_exact(cents, expected):
+    assert str(cents_to_decimal(cents)) == expected
+
+
+@pytest.mark.parametrize(
+    ("amount", "expected"),
+    [(236.1, "236.10"), (4496.9, "4496.90"), (3429.0, "3429.00"), (0.07, "0.07"), (1785.1, "1785.10")],
+)
+def test_amount_to_decimal_keeps_sent_amount(amount, expected):
+    assert amount_to_decimal(amount) == Decimal(expected)
+    assert str(amount_to_decimal(amount)) == expected